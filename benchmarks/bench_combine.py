@@ -0,0 +1,76 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Compare l'ancienne fusion des produits par iterrows et la version
+    vectorisée (process_equipement.combine_products) sur des catalogues
+    synthétiques : vérifie que les tables sont identiques puis mesure
+    le temps jusqu'à 1M de lignes.
+
+    python -m benchmarks.bench_combine [--sizes 10000 100000 1000000] [--legacy-max N]
+-------------------------------------------------
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from code.process_equipement import combine_products
+
+from .fixtures import physical_catalog
+
+
+def legacy_combine(df):
+    """The former iterrows implementation, kept as the reference."""
+    products_by_name = {}
+    for index, row in df.iterrows():
+        product_name = row['Product name']
+        category = row['Product category']
+        if product_name not in products_by_name:
+            products_by_name[product_name] = {
+                'Product category': [category],
+                'Price (€)': row['Price (€)'],
+            }
+        elif category not in products_by_name[product_name]['Product category']:
+            products_by_name[product_name]['Product category'].append(category)
+
+    return pd.DataFrame([
+        {
+            'Product name': product_name,
+            'Price (€)': info['Price (€)'],
+            'Product category': ', '.join(info['Product category']),
+        }
+        for product_name, info in products_by_name.items()
+    ])
+
+
+def timed(function, df):
+    start = time.perf_counter()
+    result = function(df)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="combine_same_products benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max", type=int, default=100_000,
+                        help="largest size also run with the iterrows version")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        df = physical_catalog(size)
+        fast, quick = timed(combine_products, df)
+        line = f"{size:>9} rows -> {len(fast):>8} products | vectorized {quick:7.3f} s"
+
+        if size <= args.legacy_max:
+            slow_result, slow = timed(legacy_combine, df)
+            pd.testing.assert_frame_equal(fast, slow_result)
+            line += f" | iterrows {slow:7.3f} s | x{slow / quick:.0f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
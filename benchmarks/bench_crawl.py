@@ -0,0 +1,89 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Test de charge du crawl sans réseau : le crawl des plantes
+    (crawl_categories) tourne contre le serveur local mock_server, pour
+    plusieurs niveaux de concurrence, à froid (cache vide) puis à chaud
+    (revalidation ETag -> 304). Débit en pages/s, réponses du serveur
+    par statut (429 et 503 = tentatives réessayées) et débit par hôte
+    atteint par le limiteur adaptatif.
+
+    python -m benchmarks.bench_crawl [--concurrency 1 4 8 16] [--latency 0.05]
+        [--error-rate 0.05] [--throttle-rps 50] [--host-rate 0]
+-------------------------------------------------
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+from pathlib import Path
+
+from .mock_server import MockCalebasse, MockConfig
+
+
+def crawl_once(server: MockCalebasse, categories, max_workers: int, parse_workers: int):
+    """Run one herbal crawl against the mock; (seconds, rows, responses by status)."""
+    from code import scrap_herbal
+
+    rows = []
+    server.stats.clear()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scrap_herbal.crawl_categories(categories, lambda index, category_rows: rows.extend(category_rows),
+                                      max_workers, parse_workers=parse_workers)
+    return time.perf_counter() - start, len(rows), dict(server.stats)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Crawl load test against the local mock server")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--categories", type=int, default=11)
+    parser.add_argument("--products", type=int, default=240, help="products per category")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rps", type=float, default=0.0)
+    parser.add_argument("--no-etag", action="store_true")
+    parser.add_argument("--host-rate", type=float, default=None,
+                        help="fixed requests/s per host instead of the adaptive rate (0 = unlimited)")
+    parser.add_argument("--parse-workers", type=int, default=None)
+    args = parser.parse_args()
+
+    from code import scrap_herbal
+    from code.crawler import PARSE_WORKERS, RATE_LIMITER
+    from code.http_cache import PageCache
+
+    # le serveur écoute sur un port libre : l'hôte n'a pas de débit enregistré
+    RATE_LIMITER.fixed_rate = args.host_rate
+    parse_workers = PARSE_WORKERS if args.parse_workers is None else args.parse_workers
+    config = MockConfig(products=args.products, latency=args.latency, jitter=args.jitter,
+                        error_rate=args.error_rate, throttle_rps=args.throttle_rps,
+                        etag=not args.no_etag)
+    nb_pages = -(-args.products // config.page_size)
+    print(f"{args.categories} categories x {nb_pages} pages, latency {args.latency}s,"
+          f" error rate {args.error_rate}, throttle {args.throttle_rps or '-'} req/s,"
+          f" host rate {'adaptive' if args.host_rate is None else args.host_rate or '-'}")
+
+    with MockCalebasse(config) as server, tempfile.TemporaryDirectory() as directory:
+        categories = [(f"{server.base_url}/en/category-{n}", f"Category {n}")
+                      for n in range(args.categories)]
+        for workers in args.concurrency:
+            # cache de pages neuf par niveau de concurrence, hors de data/cache
+            scrap_herbal.PAGE_CACHE = PageCache(Path(directory) / f"cache-{workers}.sqlite")
+            for run in ("cold", "warm"):
+                seconds, rows, stats = crawl_once(server, categories, workers, parse_workers)
+                requests = sum(stats.values())
+                retried = stats.get(429, 0) + stats.get(503, 0)
+                statuses = " ".join(f"{status}:{count}" for status, count in sorted(stats.items()))
+                print(f"workers {workers:>3} {run:<4} | {seconds:7.2f} s | {rows:>6} rows"
+                      f" | {requests / seconds:7.1f} req/s | retried {retried:>4}"
+                      f" | host rate {RATE_LIMITER.rate(server.base_url):5.1f} | {statuses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Temps d'import de chaque point d'entrée (python -X importtime), et
+    garde-fou contre les régressions : un point d'entrée qui importe une
+    bibliothèque qu'il n'utilise pas (streamlit pour le traitement,
+    matplotlib pour le scraping...) fait échouer le benchmark.
+
+    python -m benchmarks.bench_import [--repeat 3] [--max-ms N]
+-------------------------------------------------
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+UI = ['streamlit', 'matplotlib', 'seaborn']
+HTTP = ['requests', 'bs4', 'lxml']
+
+# point d'entrée -> bibliothèques qu'il ne doit pas importer
+ENTRY_POINTS: Dict[str, List[str]] = {
+    'code': UI + HTTP + ['pandas'],
+    'code.pipeline': UI + HTTP + ['pandas'],
+    'code.scrap_herbal': UI,
+    'code.scrap_equipement': UI,
+    'code.process_herbal': UI + HTTP,
+    'code.process_equipement': UI + HTTP,
+    'code.aggregates': UI + HTTP,
+    'code.price_history': UI + HTTP,
+    'code.chart_export': UI + HTTP,
+    'code.analyse_herbal': ['streamlit'] + HTTP,
+}
+
+
+def import_times(statement: str) -> Dict[str, int]:
+    """{module: self import time in µs} of a fresh interpreter running statement."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(own)
+    return times
+
+
+def measure(module: str, startup: Set[str], repeat: int) -> Tuple[float, Set[str], List]:
+    """Best import time (ms) of module, the top-level packages it loads, heaviest ones."""
+    runs = []
+    for _ in range(repeat):
+        times = {name: us for name, us in import_times(f"import {module}").items()
+                 if name not in startup}
+        runs.append(times)
+    best = min(runs, key=lambda times: sum(times.values()))
+
+    packages = {}
+    for name, us in best.items():
+        top = name.split(".")[0]
+        packages[top] = packages.get(top, 0) + us
+    heaviest = sorted(packages.items(), key=lambda item: -item[1])[:4]
+    return sum(best.values()) / 1000, set(packages), heaviest
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import time of the entry points")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="also fail when an entry point takes longer to import")
+    args = parser.parse_args()
+
+    startup = set(import_times("pass"))
+    failures = []
+    for module, forbidden in ENTRY_POINTS.items():
+        ms, packages, heaviest = measure(module, startup, args.repeat)
+        loaded = [name for name in forbidden if name in packages]
+        top = ", ".join(f"{name} {us / 1000:.0f}" for name, us in heaviest)
+        print(f"{module:<24} {ms:8.1f} ms | {top}")
+        if loaded:
+            failures.append(f"{module} imports {', '.join(loaded)}")
+        if args.max_ms is not None and ms > args.max_ms:
+            failures.append(f"{module} takes {ms:.0f} ms to import (max {args.max_ms:.0f})")
+
+    for failure in failures:
+        print(f"[FAIL] {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Rapprochement des noms (name_matching) sur des catalogues
+    synthétiques : chaque nom "type" a une variante "usage" (casse,
+    tirets, "100 g" / "100g", mot ajouté). Mesure le temps de l'index de
+    trigrammes, le rappel des variantes, et compare avec la comparaison
+    de toutes les paires sur les petites tailles.
+
+    python -m benchmarks.bench_matching [--sizes 1000 10000 50000] [--pairwise-max N]
+-------------------------------------------------
+"""
+
+import argparse
+import random
+import time
+
+from code.name_matching import MATCH_THRESHOLD, match_key, match_names, numbers, trigrams
+
+from .fixtures import name_variant, product_name
+
+
+def catalogs(size: int, seed: int = 0):
+    """size type names, and a shuffled variant of each as the usage names."""
+    rng = random.Random(seed)
+    left = [product_name(rng, i) for i in range(size)]
+    right = [name_variant(rng, name) for name in left]
+    expected = dict(zip(right, left))
+    rng.shuffle(right)
+    return left, right, expected
+
+
+def pairwise_matches(left, right, threshold: float = MATCH_THRESHOLD):
+    """Reference O(n·m) scoring: best left name of each right name."""
+    left_keys = [(name, match_key(name)) for name in left]
+    left_grams = {name: trigrams(key) for name, key in left_keys}
+    best = {}
+    for name in right:
+        key = match_key(name)
+        grams, quantities = trigrams(key), numbers(key)
+        top = None
+        for left_name, other in left_keys:
+            if numbers(other) != quantities:
+                continue
+            other_grams = left_grams[left_name]
+            score = 1.0 if key == other else 2 * len(grams & other_grams) / (len(grams) + len(other_grams))
+            if score >= threshold and (top is None or score > top[0]):
+                top = (score, left_name)
+        if top:
+            best[name] = top[1]
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Product name matching benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--pairwise-max", type=int, default=2_000,
+                        help="largest size also run with the pairwise comparison")
+    parser.add_argument("--threshold", type=float, default=MATCH_THRESHOLD)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        left, right, expected = catalogs(size)
+        start = time.perf_counter()
+        matches = match_names(left, right, args.threshold)
+        quick = time.perf_counter() - start
+
+        found = dict(zip(matches['Right name'], matches['Left name']))
+        recall = sum(found.get(name) == truth for name, truth in expected.items()) / size
+        line = (f"{size:>7} names -> {len(matches):>7} matches | recall {recall:6.1%}"
+                f" | index {quick:7.3f} s")
+
+        if size <= args.pairwise_max:
+            start = time.perf_counter()
+            reference = pairwise_matches(left, right, args.threshold)
+            slow = time.perf_counter() - start
+            agree = sum(found.get(name) == match for name, match in reference.items())
+            line += (f" | pairwise {slow:7.3f} s | x{slow / quick:.0f}"
+                     f" | same best match {agree}/{len(reference)}")
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
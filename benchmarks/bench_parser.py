@@ -0,0 +1,66 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Compare le parsing BeautifulSoup de référence et l'extraction
+    lxml directe (code/listing_parser.py) sur des pages HTML :
+    vérifie que les enregistrements sont identiques puis mesure le
+    temps par page.
+
+    python -m benchmarks.bench_parser [--fixtures DIR] [--repeat N]
+-------------------------------------------------
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from code.listing_parser import parse_herbal_listing, parse_physical_listing
+from code.scrap_equipement import parse_physical_page
+from code.scrap_herbal import parse_page
+
+from .fixtures import listing_page
+
+
+def load_pages(fixtures_dir=None):
+    """Saved HTML pages from fixtures_dir, or synthetic ones."""
+    if fixtures_dir:
+        return [path.read_text(encoding="utf-8") for path in sorted(Path(fixtures_dir).glob("*.html"))]
+    return [listing_page(f"category-{c}", page, 3) for c in range(4) for page in (1, 2, 3)]
+
+
+def per_page(parse, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            parse(html)
+    return (time.perf_counter() - start) / (repeat * len(pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Listing parser benchmark")
+    parser.add_argument("--fixtures", help="directory of saved listing pages (*.html)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = load_pages(args.fixtures)
+    print(f"{len(pages)} pages")
+
+    for html in pages:
+        assert parse_herbal_listing(html) == parse_page(html), "herbal records differ"
+        assert parse_physical_listing(html) == parse_physical_page(html), "physical records differ"
+    print("records identical")
+
+    for label, reference, fast in [
+        ("herbal", parse_page, parse_herbal_listing),
+        ("physical", parse_physical_page, parse_physical_listing),
+    ]:
+        slow = per_page(reference, pages, args.repeat)
+        quick = per_page(fast, pages, args.repeat)
+        print(f"{label:<9} bs4 {slow * 1000:7.2f} ms/page | lxml {quick * 1000:7.2f} ms/page | x{slow / quick:.1f}")
+
+
+if __name__ == "__main__":
+    main()
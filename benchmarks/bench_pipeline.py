@@ -0,0 +1,333 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Benchmark de chaque étape du pipeline sur des catalogues
+    synthétiques (pages de listing au balisage des cartes produits,
+    tables brutes au format des CSV scrappés) de 1k, 100k et 1M de
+    produits : temps et pic mémoire (tracemalloc) par étape, résultats
+    enregistrés en JSON pour comparer les exécutions dans le temps.
+
+    python -m benchmarks.bench_pipeline [--sizes 1000 100000 1000000]
+        [--stages parse_herbal,combine] [--no-memory] [--compare previous.json]
+-------------------------------------------------
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from .fixtures import herbal_catalog, listing_page, physical_catalog
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+PRODUCTS_PER_PAGE = 24
+DISTINCT_PAGES = 64   # pages HTML générées puis réutilisées en boucle
+
+
+# ======================
+# CATALOG
+# ======================
+class Catalog:
+    """Synthetic catalog of one size, its files written in a temporary directory."""
+
+    def __init__(self, size: int, directory: Path):
+        from code.storage import write_table
+
+        self.size = size
+        self.directory = directory
+        self.raw_physical = str(directory / "raw_physical_products.csv")
+        self.raw_herbal = str(directory / "raw_herbal_products.csv")
+        self.raw_uses = str(directory / "raw_uses_products.csv")
+        self.final_physical = str(directory / "final_process_equipement.csv")
+        self.final_herbal = str(directory / "final_herb_products.csv")
+        self.aggregates = str(directory / "aggregates.csv")
+        self.images = directory / "images"
+        self.images.mkdir()
+
+        # environ 3 lignes par produit d'équipement, comme le catalogue réel
+        self.physical = physical_catalog(3 * size, size, ids=True)
+        herbal, uses = herbal_catalog(size)
+        write_table(self.physical, self.raw_physical)
+        write_table(herbal, self.raw_herbal)
+        write_table(uses, self.raw_uses)
+        self._pages = None
+
+    def pages(self) -> List[str]:
+        """Listing pages holding size products (a few distinct pages, cycled)."""
+        if self._pages is None:
+            self._pages = [listing_page(f"category-{n % 8}", n // 8 + 1, DISTINCT_PAGES // 8 + 1,
+                                        PRODUCTS_PER_PAGE, seed=n)
+                           for n in range(DISTINCT_PAGES)]
+        nb_pages = -(-self.size // PRODUCTS_PER_PAGE)
+        return [self._pages[n % DISTINCT_PAGES] for n in range(nb_pages)]
+
+    def scraped_records(self) -> List[List[Dict]]:
+        """physical rows as scrape_physical_products returns them (raw prices)."""
+        from code.identity import PRODUCT_ID
+
+        df = self.physical
+        prices = df['Price (€)'].map('{:.2f}'.format).str.replace('.', ',') + '\xa0€'
+        records = [
+            {'Product name': name, 'Price (€)': price, 'Product category': category,
+             PRODUCT_ID: handle}
+            for name, price, category, handle in zip(df['Product name'], prices,
+                                                     df['Product category'], df[PRODUCT_ID])
+        ]
+        return [records]
+
+
+# ======================
+# STAGES
+# ======================
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    prepare: Callable   # prepare(catalog) -> run() ; run() -> nombre de lignes traitées
+
+
+def parse_herbal(catalog):
+    from code.listing_parser import parse_herbal_page
+    pages = catalog.pages()
+
+    def run():
+        items = []
+        for html in pages:
+            items.extend(parse_herbal_page(html)["items"])
+        return len(items)
+    return run
+
+
+def parse_physical(catalog):
+    from code.listing_parser import parse_physical_listing
+    pages = catalog.pages()
+
+    def run():
+        items = []
+        for html in pages:
+            items.extend(parse_physical_listing(html)["items"])
+        return len(items)
+    return run
+
+
+def save_products(catalog):
+    from code.scrap_equipement import save_products as save
+    records = catalog.scraped_records()
+    csv_file = catalog.directory / "saved_physical_products.csv"
+    ndjson_file = catalog.directory / "saved_physical_products.ndjson"
+
+    def run():
+        # save_products nettoie les prix en place : copie des enregistrements
+        save([[dict(record) for record in category] for category in records], csv_file, ndjson_file)
+        return sum(map(len, records))
+    return run
+
+
+def combine(catalog):
+    from code.process_equipement import combine_same_products
+    return lambda: len(combine_same_products(catalog.raw_physical, catalog.final_physical))
+
+
+def process_herbal(catalog):
+    from code.process_herbal import process_herbal_products
+    return lambda: len(process_herbal_products(catalog.raw_herbal, catalog.raw_uses,
+                                               catalog.final_herbal))
+
+
+def aggregates(catalog):
+    from code.aggregates import build_aggregates
+    from code.storage import read_table
+
+    def run():
+        return len(build_aggregates(read_table(catalog.final_herbal, categorical=False),
+                                    read_table(catalog.raw_physical, categorical=False),
+                                    read_table(catalog.final_physical, categorical=False)))
+    return run
+
+
+def write_aggregates(catalog):
+    """Aggregates table of the catalog's final tables, as the aggregate stage writes it."""
+    from code.aggregates import build_aggregates
+    from code.storage import read_table, write_table
+
+    write_table(build_aggregates(read_table(catalog.final_herbal, categorical=False),
+                                 read_table(catalog.raw_physical, categorical=False),
+                                 read_table(catalog.final_physical, categorical=False)),
+                catalog.aggregates)
+
+
+def analyse_equipement(plot):
+    def prepare(catalog):
+        from code import analyse_equipement
+        from code.storage import read_table
+        write_aggregates(catalog)
+        image = str(catalog.images / f"{plot}.png")
+
+        def run():
+            # lecture de la table des agrégats comprise, comme le tableau de bord
+            aggregates = read_table(catalog.aggregates)
+            getattr(analyse_equipement, plot)(None, image, aggregates=aggregates)
+            return len(catalog.physical)
+        return run
+    return prepare
+
+
+def analyse_herbal(plot, *params):
+    def prepare(catalog):
+        from code import analyse_herbal
+        from code.storage import read_table
+        write_aggregates(catalog)
+
+        def run():
+            aggregates = read_table(catalog.aggregates)
+            getattr(analyse_herbal, plot)(*params, str(catalog.images / f"{plot}.png"),
+                                          aggregates=aggregates)
+            return catalog.size
+        return run
+    return prepare
+
+
+STAGES: List[Stage] = [
+    Stage("parse_herbal", parse_herbal),
+    Stage("parse_physical", parse_physical),
+    Stage("save_products", save_products),
+    Stage("combine_same_products", combine),
+    Stage("process_herbal_products", process_herbal),
+    Stage("aggregates", aggregates),
+    Stage("pei_figure", analyse_equipement("pei_figure")),
+    Stage("bar_figure", analyse_equipement("bar_figure")),
+    Stage("plot_box_visualisation", analyse_equipement("plot_box_visualisation")),
+    Stage("plot_pie_categorie", analyse_herbal("plot_pie_categorie", "Product category", "Categories")),
+    Stage("plot_bar_price", analyse_herbal("plot_bar_price", "Use category", "Mean price")),
+    Stage("plot_heatmap", analyse_herbal("plot_heatmap")),
+]
+STAGE_NAMES = [stage.name for stage in STAGES]
+
+
+# ======================
+# MEASURE
+# ======================
+def measure(run: Callable, memory: bool = True) -> Dict:
+    """Wall time of run(), then its peak traced memory in a second run."""
+    gc.collect()
+    start = time.perf_counter()
+    rows = run()
+    seconds = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 4),
+        "rows_per_second": round(rows / seconds) if seconds else None,
+        "peak_mib": round(peak / 2**20, 2) if peak is not None else None,
+    }
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results: List[Dict], previous_path) -> None:
+    """Print the time and memory ratios against a previous results file."""
+    with open(previous_path, encoding="utf-8") as f:
+        previous = {(r["stage"], r["size"]): r for r in json.load(f)["results"]}
+    print(f"\nvs {previous_path}")
+    for result in results:
+        before = previous.get((result["stage"], result["size"]))
+        if not before:
+            continue
+        line = f"{result['stage']:<24} {result['size']:>9} | time x{result['seconds'] / before['seconds']:.2f}"
+        if result["peak_mib"] and before.get("peak_mib"):
+            line += f" | memory x{result['peak_mib'] / before['peak_mib']:.2f}"
+        print(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Pipeline stages benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--stages", default=",".join(STAGE_NAMES),
+                        help=f"comma-separated stages (default: all of {','.join(STAGE_NAMES)})")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("--output", default=None, help="results file (default: benchmarks/results/)")
+    parser.add_argument("--compare", default=None, help="previous results file to compare with")
+    args = parser.parse_args()
+
+    selected = [name.strip() for name in args.stages.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in STAGE_NAMES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    # rendu hors écran, sans les avertissements de Streamlit hors de son serveur
+    import matplotlib
+    matplotlib.use("Agg")
+    logging.disable(logging.WARNING)
+
+    results = []
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory(prefix="bench-pipeline-") as directory:
+            start = time.perf_counter()
+            catalog = Catalog(size, Path(directory))
+            print(f"[CATALOG] {size} products generated in {time.perf_counter() - start:.1f} s")
+            for stage in STAGES:
+                if stage.name not in selected:
+                    continue
+                run = stage.prepare(catalog)
+                # les étapes impriment leur résumé : seul le benchmark s'affiche
+                with open(os.devnull, "w") as devnull:
+                    stdout, sys.stdout = sys.stdout, devnull
+                    try:
+                        result = measure(run, memory=not args.no_memory)
+                    finally:
+                        sys.stdout = stdout
+                result = {"stage": stage.name, "size": size, **result}
+                results.append(result)
+                memory = f" | peak {result['peak_mib']:9.1f} MiB" if result["peak_mib"] is not None else ""
+                print(f"{stage.name:<24} {size:>9} | {result['seconds']:8.3f} s"
+                      f" | {result['rows']:>9} rows{memory}")
+
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"[SAVED] {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
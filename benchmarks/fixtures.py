@@ -0,0 +1,149 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Génération de pages de listing synthétiques reprenant le balisage
+    des cartes produits du site (product-card, product-card-title,
+    product-card-price, pagination rel="next"), pour les benchmarks.
+-------------------------------------------------
+"""
+
+import random
+from html import escape
+
+TITLE_CLASS = ('product-card-title line-clamp-2 max-w-full font-medium underline-offset-2 '
+               'group-hover:underline text-center text-sm @[200px]:text-base')
+PRICE_CLASS = 'product-card-price flex items-center gap-2 text-base font-medium @[200px]:text-lg'
+
+WORDS = ['Ginseng', 'root', 'Jujube', 'Goji', 'berry', 'Astragalus', 'Licorice',
+         'Cinnamon', 'bark', 'Peony', 'white', 'Reishi', 'Moxa', 'stick', 'needle',
+         'Gua sha', 'stone', 'jade', 'roller', 'cup', 'Tea', 'green', 'blend', 'Bio']
+
+
+def product_name(rng: random.Random, index: int) -> str:
+    words = rng.sample(WORDS, rng.randint(2, 4))
+    return f"{' '.join(words)} - n°{index} {rng.choice(['50g', '100 g', '250g', '1 kg'])}"
+
+
+def name_variant(rng: random.Random, name: str) -> str:
+    """The same product as written by another listing: case, dashes, units."""
+    variant = name.replace(' - ', rng.choice([' – ', ' ', ' - ']))
+    variant = rng.choice([variant, variant.lower(), variant.title()])
+    if rng.random() < 0.5:
+        variant = variant.replace(' g', 'g').replace(' kg', 'kg')
+    if rng.random() < 0.3:
+        variant += ' Bio'
+    return variant
+
+
+def product_card(name: str, handle: str, price: str) -> str:
+    price_html = f'<span class="">{price}</span>' if price else ''
+    return (
+        '<div class="product-card @container group relative flex flex-col gap-2">'
+        f'<a href="/en/products/{handle}" class="block">'
+        f'<img src="/images/{handle}.webp" alt="{escape(name)}" loading="lazy">'
+        f'<div class="{TITLE_CLASS}">\n  {escape(name)}\n</div>'
+        '</a>'
+        f'<div class="{PRICE_CLASS}">{price_html}</div>'
+        '</div>'
+    )
+
+
+def listing_page(category: str, page: int, nb_pages: int, nb_products: int = 24,
+                 seed: int = 0, first_index: int = None) -> str:
+    """
+    HTML of one listing page of a synthetic category. Products are numbered
+    from first_index ((page - 1) * nb_products by default).
+    """
+    rng = random.Random(f"{seed}-{category}-{page}")
+    if first_index is None:
+        first_index = (page - 1) * nb_products
+    cards = []
+    for i in range(nb_products):
+        index = first_index + i
+        name = product_name(rng, index)
+        # quelques produits sans prix affiché
+        price = '' if rng.random() < 0.02 else f"{rng.uniform(2, 200):.2f}".replace('.', ',') + '\xa0€'
+        cards.append(product_card(name, f"{category}-{index}", price))
+
+    links = ''.join(
+        f'<a href="/en/{category}?page={n}" class="page-link">{n}</a>'
+        for n in range(1, nb_pages + 1)
+    )
+    if page < nb_pages:
+        links += f'<a href="/en/{category}?page={page + 1}" rel="next" class="page-link">›</a>'
+
+    return (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">'
+        f'<title>{escape(category)} | Calebasse</title></head><body>'
+        '<header><nav><a href="/en">Calebasse</a></nav></header>'
+        '<main><!-- listing -->'
+        f'<div class="grid grid-cols-2 gap-4 md:grid-cols-4">{"".join(cards)}</div>'
+        f'<nav class="pagination" aria-label="pagination">{links}</nav>'
+        '</main><footer><p>© Calebasse</p></footer></body></html>'
+    )
+
+
+PHYSICAL_CATEGORIES = ['cooker', 'kit', 'moxibustion', 'acupuncture', 'new products',
+                       'cupping', 'decorative', 'books', 'skin']
+
+
+def physical_catalog(nb_rows: int, nb_products: int = None, seed: int = 0, ids: bool = False):
+    """
+    Synthetic raw_physical_products table (Product name, Price (€),
+    Product category, and Product ID when ids): products are listed in
+    several categories, as in the real catalog, so names repeat across rows.
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    nb_products = nb_products or max(1, nb_rows // 3)
+    product = rng.integers(0, nb_products, nb_rows)
+    prices = np.round(rng.uniform(2, 200, nb_products), 2)
+    categories = np.array(PHYSICAL_CATEGORIES)
+    df = pd.DataFrame({
+        'Product name': pd.Series(product).map('Product n°{}'.format).to_numpy(),
+        'Price (€)': prices[product],
+        'Product category': categories[rng.integers(0, len(categories), nb_rows)],
+    })
+    if ids:
+        df['Product ID'] = pd.Series(product).map('product-{}'.format).to_numpy()
+    return df
+
+
+HERBAL_TYPES = ['Foot baths', 'Bio', 'Mushroom', 'Congees', 'Flower infusions', 'Homemade blends',
+                'Bulk plantes', 'Tea', 'TMC Herbs', 'Food supplements', 'Plant powder']
+HERBAL_USES = ['Articulations and muscles', 'Calm and well-being', 'Respiratory comfort',
+               'Detox and drainer', 'Female balance', 'Fatigue and Energy', 'Cardiovascular health',
+               'Beauty and slimming', 'Circulation', 'Urinary comfort', 'Digestion',
+               'Male balance', 'MTV', 'Sexual vitality']
+
+
+def herbal_catalog(nb_products: int, seed: int = 0, ids: bool = True):
+    """
+    Synthetic raw_herbal_products and raw_uses_products tables (Product
+    name, Price (€), Category, Product ID): each product is listed in 1
+    or 2 type categories and in 0 to 2 use categories.
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    names = pd.Series(np.arange(nb_products)).map('Herbal product n°{}'.format).to_numpy()
+    prices = np.round(rng.uniform(2, 200, nb_products), 2)
+
+    def listing(categories, low, high):
+        product = np.repeat(np.arange(nb_products), rng.integers(low, high + 1, nb_products))
+        df = pd.DataFrame({
+            'Product name': names[product],
+            'Price (€)': prices[product],
+            'Category': np.array(categories)[rng.integers(0, len(categories), len(product))],
+        })
+        if ids:
+            df['Product ID'] = pd.Series(product).map('herb-{}'.format).to_numpy()
+        return df.drop_duplicates(['Product name', 'Category'], ignore_index=True)
+
+    return listing(HERBAL_TYPES, 1, 2), listing(HERBAL_USES, 0, 2)
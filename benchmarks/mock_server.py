@@ -0,0 +1,210 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Serveur HTTP local qui imite les listings de calebasse.com (cartes
+    produits, pagination rel="next") pour tester les scrapers sans
+    réseau : taille du catalogue, latence, taux d'erreur, limitation
+    429 (Retry-After) et ETag / 304 configurables. Toute URL /en/<slug>
+    est une catégorie, paginée par ?page=N.
+
+    python -m benchmarks.mock_server [--port 8765] [--products 120] [--latency 0.05]
+        [--error-rate 0.05] [--throttle-rps 20] [--no-etag]
+    python -m code.scrap_herbal --base-url http://127.0.0.1:8765
+-------------------------------------------------
+"""
+
+import argparse
+import hashlib
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from .fixtures import listing_page
+
+EMPTY_PAGE = '<!DOCTYPE html><html lang="en"><body><main></main></body></html>'
+
+
+# ======================
+# CONFIG
+# ======================
+@dataclass
+class MockConfig:
+    products: int = 120               # produits par catégorie
+    page_size: int = 24               # produits par page
+    sizes: Dict[str, int] = field(default_factory=dict)   # slug -> produits (sinon products)
+    latency: float = 0.0              # secondes avant chaque réponse
+    jitter: float = 0.0               # latence aléatoire ajoutée, uniforme dans [0, jitter]
+    error_rate: float = 0.0           # part des requêtes répondues en 503
+    throttle_rps: float = 0.0         # requêtes par seconde et par client (0 = illimité)
+    retry_after: int = 1              # Retry-After des réponses 429, en secondes
+    etag: bool = True                 # ETag + réponses 304 aux requêtes conditionnelles
+    seed: int = 0
+
+
+# ======================
+# SERVER
+# ======================
+class MockCalebasse(ThreadingHTTPServer):
+    """
+    Threaded mock of the listing pages. Usable from the command line or
+    in-process: `with MockCalebasse(config) as server: server.base_url`.
+    stats counts the responses by status.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), MockHandler)
+        self.config = config or MockConfig()
+        self.stats: Counter = Counter()
+        self._lock = threading.Lock()
+        self._random = random.Random(self.config.seed)
+        self._buckets: Dict[str, tuple] = {}   # client -> (jetons, instant)
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+    # --- fautes injectées ---
+    def count(self, status: int) -> None:
+        with self._lock:
+            self.stats[status] += 1
+
+    def fails(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.config.error_rate
+
+    def delay(self) -> float:
+        with self._lock:
+            return self.config.latency + self._random.uniform(0, self.config.jitter)
+
+    def throttled(self, client: str) -> bool:
+        """Token bucket per client: throttle_rps requests/s, bursts of the same size."""
+        rate = self.config.throttle_rps
+        if rate <= 0:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(client, (rate, now))
+            tokens = min(rate, tokens + (now - last) * rate)
+            if tokens < 1:
+                self._buckets[client] = (tokens, now)
+                return True
+            self._buckets[client] = (tokens - 1, now)
+            return False
+
+    # --- catalogue ---
+    def page(self, slug: str, number: int) -> bytes:
+        config = self.config
+        return render_page(slug, number, config.sizes.get(slug, config.products),
+                           config.page_size, config.seed)
+
+
+@lru_cache(maxsize=4096)
+def render_page(slug: str, number: int, products: int, page_size: int, seed: int) -> bytes:
+    """Body of a listing page; pages past the last one list no product."""
+    nb_pages = max(1, -(-products // page_size))
+    if number < 1 or number > nb_pages:
+        return EMPTY_PAGE.encode()
+    first = (number - 1) * page_size
+    html = listing_page(slug, number, nb_pages, min(page_size, products - first), seed,
+                        first_index=first)
+    return html.encode()
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, comme le site réel
+    server: MockCalebasse
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        time.sleep(server.delay())
+
+        if server.throttled(self.client_address[0]):
+            return self.reply(429, b"Too Many Requests", {"Retry-After": str(server.config.retry_after)})
+        if server.fails():
+            return self.reply(503, b"Service Unavailable")
+        parts = url.path.strip("/").split("/")
+        if len(parts) != 2 or parts[0] != "en" or not parts[1]:
+            return self.reply(404, b"Not Found")
+        try:
+            number = int(parse_qs(url.query).get("page", ["1"])[0])
+        except ValueError:
+            return self.reply(404, b"Not Found")
+
+        body = server.page(parts[1], number)
+        headers = {"Content-Type": "text/html; charset=utf-8"}
+        if server.config.etag:
+            etag = '"%s"' % hashlib.md5(body).hexdigest()
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                return self.reply(304, b"", headers)
+        self.reply(200, body, headers)
+
+    def reply(self, status: int, body: bytes, headers: Optional[dict] = None) -> None:
+        self.server.count(status)
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local mock of the Calebasse listing pages")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--products", type=int, default=120, help="products per category")
+    parser.add_argument("--page-size", type=int, default=24)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency (max seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 503 responses")
+    parser.add_argument("--throttle-rps", type=float, default=0.0,
+                        help="answer 429 beyond this many requests/s per client (0: never)")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--no-etag", action="store_true", help="no ETag, never answer 304")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = MockConfig(products=args.products, page_size=args.page_size, latency=args.latency,
+                        jitter=args.jitter, error_rate=args.error_rate,
+                        throttle_rps=args.throttle_rps, retry_after=args.retry_after,
+                        etag=not args.no_etag, seed=args.seed)
+    server = MockCalebasse(config, args.host, args.port)
+    print(f"[MOCK] serving {server.base_url}/en/<category>?page=N (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"[MOCK] responses: {dict(server.stats)}")
+
+
+if __name__ == "__main__":
+    main()
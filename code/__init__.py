@@ -1,14 +1,33 @@
-from .process_equipement import main as process_equipement_products
-from .process_herbal import main as process_herbal_products
-from .scrap_equipement import main as scrap_equipement_products
-from .scrap_herbal import scrap_all as scrap_herbal_products
-from .analyse_equipement import (
-    pei_figure,
-    bar_figure,
-    plot_box_visualisation
-)
-from .analyse_herbal import (
-    plot_pie_categorie,
-    plot_bar_price,
-    plot_heatmap, 
-)
\ No newline at end of file
+# Les sous-modules sont importés au premier accès (PEP 562) : un script de
+# scraping ou de traitement ne charge ni matplotlib, ni seaborn, ni streamlit.
+import importlib
+
+_EXPORTS = {
+    'process_equipement_products': ('.process_equipement', 'main'),
+    'process_herbal_products': ('.process_herbal', 'main'),
+    'aggregate_products': ('.aggregates', 'main'),
+    'scrap_equipement_products': ('.scrap_equipement', 'main'),
+    'scrap_herbal_products': ('.scrap_herbal', 'scrap_all'),
+    'pei_figure': ('.analyse_equipement', 'pei_figure'),
+    'bar_figure': ('.analyse_equipement', 'bar_figure'),
+    'plot_box_visualisation': ('.analyse_equipement', 'plot_box_visualisation'),
+    'plot_pie_categorie': ('.analyse_herbal', 'plot_pie_categorie'),
+    'plot_bar_price': ('.analyse_herbal', 'plot_bar_price'),
+    'plot_heatmap': ('.analyse_herbal', 'plot_heatmap'),
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    try:
+        module, attribute = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module, __name__), attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
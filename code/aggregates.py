@@ -0,0 +1,180 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Étape d'agrégation, lancée après process_herbal / process_equipement :
+    statistiques de prix (nombre, moyenne, médiane, quartiles, min, max,
+    moustaches) par catégorie de produit, par catégorie d'usage et par
+    case (catégorie de produit x catégorie d'usage). Les graphiques
+    lisent cette table : leur coût ne dépend plus du nombre de produits.
+-------------------------------------------------
+"""
+
+import os
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from .metrics import table_written
+from .storage import read_table, table_path, write_table
+
+# ======================
+# CONFIG
+# ======================
+HERBAL_CSV = 'data/final_herb_products.csv'
+EQUIPMENT_RAW_CSV = 'data/raw_physical_products.csv'
+EQUIPMENT_CSV = 'data/final_process_equipement.csv'
+AGGREGATES_CSV = 'data/aggregates.csv'
+
+PRICE = 'Price (€)'
+KEYS = ['Product category', 'Use category']
+STATS = ['count', 'mean', 'median', 'q1', 'q3', 'min', 'max', 'whislo', 'whishi']
+FLIERS = 'fliers'        # prix hors moustaches, "a;b;c" (boîtes à moustaches)
+COLUMNS = ['Dataset', 'Dimension'] + KEYS + STATS + [FLIERS]
+
+
+# ======================
+# STATS
+# ======================
+def price_stats(df: pd.DataFrame, keys: List[str], price_col: str = PRICE,
+                fliers: bool = False) -> pd.DataFrame:
+    """
+    Price statistics per group of keys, one row per group (sorted).
+    count is the number of rows, the other columns ignore missing prices.
+    whislo / whishi are the box plot whiskers: the most extreme prices
+    within 1.5 IQR of the quartiles, as in matplotlib's boxplot.
+    fliers=True adds the prices beyond the whiskers (FLIERS column).
+    """
+    df = df[keys + [price_col]].dropna(subset=keys)
+    groups = df.groupby(keys, observed=True)[price_col]
+    stats = pd.DataFrame({
+        'count': groups.size(),
+        'mean': groups.mean(),
+        'median': groups.median(),
+        'q1': groups.quantile(0.25),
+        'q3': groups.quantile(0.75),
+        'min': groups.min(),
+        'max': groups.max(),
+    })
+
+    # moustaches : bornes 1.5 IQR ramenées sur les prix observés
+    iqr = stats['q3'] - stats['q1']
+    bounds = pd.DataFrame({'low': stats['q1'] - 1.5 * iqr, 'high': stats['q3'] + 1.5 * iqr})
+    rows = df.join(bounds, on=keys)
+    prices = rows[price_col]
+    stats['whislo'] = prices.where(prices >= rows['low']).groupby(
+        [rows[key] for key in keys], observed=True).min()
+    stats['whishi'] = prices.where(prices <= rows['high']).groupby(
+        [rows[key] for key in keys], observed=True).max()
+    if fliers:
+        outside = (prices < rows['low']) | (prices > rows['high'])
+        values = prices[outside].groupby([rows.loc[outside, key] for key in keys], observed=True)
+        stats[FLIERS] = values.agg(join_fliers).reindex(stats.index).fillna('')
+    return stats.reset_index()
+
+
+def join_fliers(prices) -> str:
+    return ';'.join(str(price) for price in sorted(prices))
+
+
+def split_fliers(value) -> List[float]:
+    """Prices of a FLIERS cell (empty or missing: none)."""
+    if not isinstance(value, str) or not value:
+        return []
+    return [float(price) for price in value.split(';')]
+
+
+def explode_categories(df: pd.DataFrame, column: str) -> pd.DataFrame:
+    """One row per category of a "a; b" column, with the product row id."""
+    exploded = (
+        df[[PRICE, column]]
+        .assign(row=np.arange(len(df)))
+        .assign(**{column: df[column].astype('string').str.split(';')})
+        .explode(column)
+    )
+    exploded[column] = exploded[column].str.strip()
+    return exploded.reset_index(drop=True)
+
+
+def build_aggregates(herbal: pd.DataFrame, equipment_raw: pd.DataFrame,
+                     equipment: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregates table (long format): one row per (Dataset, Dimension, keys).
+    herbal: per Product category, per Use category and per cell;
+    equipment: per Product category of the raw rows, with the fliers
+    of its box plot.
+    Dimension "all" holds the totals of each final table.
+    """
+    products = explode_categories(herbal, 'Product category')
+    uses = explode_categories(herbal, 'Use category')
+    cells = products.merge(uses[['row', 'Use category']], on='row')
+
+    parts = [
+        ('herbal', 'all', price_stats(herbal.assign(all='all'), ['all'])),
+        ('herbal', 'Product category', price_stats(products, ['Product category'])),
+        ('herbal', 'Use category', price_stats(uses, ['Use category'])),
+        ('herbal', 'cell', price_stats(cells, KEYS)),
+        ('equipment', 'all', price_stats(equipment.assign(all='all'), ['all'])),
+        ('equipment', 'Product category',
+         price_stats(equipment_raw, ['Product category'], fliers=True)),
+    ]
+    tables = [
+        stats.drop(columns='all', errors='ignore').assign(Dataset=dataset, Dimension=dimension)
+        for dataset, dimension, stats in parts
+    ]
+    return pd.concat(tables, ignore_index=True).reindex(columns=COLUMNS)
+
+
+def select(aggregates: pd.DataFrame, dataset: str, dimension: str) -> pd.DataFrame:
+    """Rows of one (dataset, dimension), indexed by their category key(s)."""
+    rows = aggregates[(aggregates['Dataset'] == dataset) & (aggregates['Dimension'] == dimension)]
+    keys = KEYS if dimension == 'cell' else [dimension] if dimension in KEYS else []
+    # tables construites avant la colonne FLIERS : aucune valeur aberrante
+    rows = rows.reindex(columns=keys + STATS + [FLIERS])
+    for key in keys:
+        rows[key] = rows[key].astype(str)
+    return rows.set_index(keys) if keys else rows.reset_index(drop=True)
+
+
+# ======================
+# STAGE
+# ======================
+def is_stale(output_csv=AGGREGATES_CSV,
+             inputs=(HERBAL_CSV, EQUIPMENT_RAW_CSV, EQUIPMENT_CSV)) -> bool:
+    """True when the aggregates are missing or older than one of their inputs."""
+    def mtime(path):
+        times = [os.path.getmtime(f) for f in (path, table_path(path)) if os.path.exists(f)]
+        return max(times) if times else None
+
+    built = mtime(output_csv)
+    return built is None or any((mtime(path) or 0) > built for path in inputs)
+
+
+def main(incremental=False):
+    """Build data/aggregates from the final herbal and equipment tables."""
+    if incremental and not is_stale():
+        print(f"Aggregates up to date: {AGGREGATES_CSV}")
+        return read_table(AGGREGATES_CSV)
+
+    aggregates = build_aggregates(
+        read_table(HERBAL_CSV, categorical=False),
+        read_table(EQUIPMENT_RAW_CSV, categorical=False),
+        read_table(EQUIPMENT_CSV, categorical=False),
+    )
+    store = write_table(aggregates, AGGREGATES_CSV)
+    table_written(AGGREGATES_CSV, len(aggregates))
+    print(f"✅ {len(aggregates)} aggregate rows saved in {store}")
+    return aggregates
+
+
+def ensure_aggregates() -> None:
+    """Rebuild the aggregates only if an input table changed."""
+    if is_stale():
+        main()
+
+
+if __name__ == '__main__':
+    main()
@@ -13,11 +13,24 @@ import os
 import csv 
 import pandas as pd 
 import matplotlib.pyplot as plt
-import streamlit as st
 
-def pei_figure(df, image_name):
+from .aggregates import AGGREGATES_CSV, FLIERS, select, split_fliers
+from .plot_theme import apply_theme
+from .storage import cached_table
+
+
+def category_stats(aggregates=None):
+    """Price statistics per product category, read from the aggregates table."""
+    if aggregates is None:
+        aggregates = cached_table(AGGREGATES_CSV)
+    return select(aggregates, 'equipment', 'Product category')
+
+
+def pei_chart(stats):
+    """Pie chart figure of the products per category, from category_stats."""
+    apply_theme()
     # trouvers les informations de la colonne de catégorie
-    category_counts = df['Product category'].value_counts()
+    category_counts = stats['count'].sort_values(ascending=False, kind='stable')
     labels = category_counts.index
     data = category_counts.to_numpy()
 
@@ -44,15 +57,25 @@ def pei_figure(df, image_name):
     )
     ax.set_title('Répartition des produits par catégorie')
     ax.axis('equal')
+    return fig
+
+
+def pei_figure(df, image_name, aggregates=None):
+    """Save and show the pie chart. df is ignored (deprecated): the stats come from the aggregates."""
+    fig = pei_chart(category_stats(aggregates))
     current_path = os.getcwd()
     save_pie_image = os.path.join(current_path, image_name)
     fig.savefig(save_pie_image, dpi=300, bbox_inches='tight')
+    import streamlit as st
     st.pyplot(fig)
+    plt.close(fig)
   
     
-def bar_figure(df, image_name):
+def bar_chart(stats):
+    """Bar chart figure of the mean price per category, from category_stats."""
+    apply_theme()
     # trouver les informations de la colonne de catégorie et de prix
-    df_mean = df.groupby("Product category").agg({"Price (€)": "mean"})
+    df_mean = stats[['mean']].rename(columns={'mean': 'Price (€)'}).sort_index()
     x = df_mean.index
     y = df_mean['Price (€)']
 
@@ -73,31 +96,63 @@ def bar_figure(df, image_name):
     ax.set_xlabel('Catégorie de produit')
     ax.set_title('Prix moyen par catégorie')
     plt.xticks(rotation=45, ha='right')
+    return fig
+
+
+def bar_figure(df, image_name, aggregates=None):
+    """Save and show the bar chart. df is ignored (deprecated): the stats come from the aggregates."""
+    fig = bar_chart(category_stats(aggregates))
     current_image = os.getcwd()
     save_bar_image = os.path.join(current_image, image_name)
     fig.savefig(save_bar_image, dpi=300)
+    import streamlit as st
     st.pyplot(fig)
+    plt.close(fig)
 
 
-def plot_box_visualisation(df, image_name):
-    plt.figure(figsize=(8,6))
-    df.boxplot(column='Price (€)', by='Product category', grid=False)
-
-    # streamlit 
+def box_chart(stats):
+    """Box plot figure of the price distribution per category, from category_stats."""
+    apply_theme()
+    # boîtes dessinées à partir des quartiles, moustaches et valeurs
+    # aberrantes précalculés
+    boxes = [
+        {'label': category, 'med': row['median'], 'q1': row['q1'], 'q3': row['q3'],
+         'whislo': row['whislo'], 'whishi': row['whishi'], 'fliers': split_fliers(row[FLIERS])}
+        for category, row in stats.sort_index().iterrows()
+    ]
     fig, ax = plt.subplots(figsize=(8,6))
-    df.boxplot(column='Price (€)', by='Product category', grid=False, ax=ax)
+    ax.bxp(boxes)
     ax.set_title('Distribution du prix par catégorie')
     ax.set_xlabel('Catégorie de produit')
     ax.set_ylabel('Prix (€)')
-    plt.suptitle('')
     plt.xticks(rotation=45, ha='right')
+    return fig
+
+
+def plot_box_visualisation(df, image_name, aggregates=None):
+    """Save and show the box plot. df is ignored (deprecated): the stats come from the aggregates."""
+    fig = box_chart(category_stats(aggregates))
     current_path = os.getcwd()
     save_box_image = os.path.join(current_path, image_name)
     fig.savefig(save_box_image, dpi=300)
+    import streamlit as st
     st.pyplot(fig)
-    
-
+    plt.close(fig)
 
 
+def compare_chart(nb_food, nb_eq):
+    """Pie chart figure of the number of herbal vs equipment products."""
+    apply_theme()
+    labels = ['Food (Herbal)', 'Equipment']
+    data = [nb_food, nb_eq]
 
- 
+    fig, ax = plt.subplots(figsize=(6, 6))
+    ax.pie(
+        data,
+        labels=labels,
+        autopct='%1.1f%%',
+        startangle=90
+    )
+    ax.set_title('Répartition des produits')
+    ax.axis('equal')
+    return fig
@@ -13,20 +13,28 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-sns.set_theme(style="whitegrid", palette="Set2")
 from matplotlib.colors import ListedColormap
-import streamlit as st
+
+from .aggregates import AGGREGATES_CSV, select
+from .plot_theme import apply_theme
+from .storage import cached_table
+
+
+# Les graphiques lisent la table des agrégats (étape aggregate), comme
+# l'export des images : une seule source pour le tableau de bord et l'export.
+# La table est chargée une seule fois, puis rechargée si le fichier change
+def herbal_stats(dimension, aggregates=None):
+    """Herbal price statistics of one dimension of the aggregates table."""
+    if aggregates is None:
+        aggregates = cached_table(AGGREGATES_CSV)
+    return select(aggregates, 'herbal', dimension)
+
 
 # Analyse de la classification des produits selon la catégorie de produits / catégorie d'usage 
-def plot_pie_categorie(category, name, image_name):
-    df_final = pd.read_csv('data/final_herb_products.csv')
-    df_product = df_final.copy()
-    df_product[category] = df_product[category].astype(str)
-
-    cate_product = (
-        df_product[category]
-        .str.split(';').explode().str.strip().value_counts().sort_values(ascending=False)
-    )
+def pie_categorie_chart(name, stats):
+    """Pie chart figure of the products per category, from the category stats."""
+    apply_theme()
+    cate_product = stats['count'].sort_values(ascending=False, kind='stable')
     label_product = cate_product.index
     data_product = cate_product.values
 
@@ -48,23 +56,26 @@ def plot_pie_categorie(category, name, image_name):
 
     plt.setp(autotexts, size=7, weight="bold")
     ax.set_title(name)
+    return fig
+
+
+def plot_pie_categorie(category, name, image_name, aggregates=None):
+    fig = pie_categorie_chart(name, herbal_stats(category, aggregates))
     current_path = os.getcwd()
     save_pie_image = os.path.join(current_path, image_name)
     fig.savefig(save_pie_image, dpi=300, bbox_inches='tight')
+    import streamlit as st
     st.pyplot(fig)
+    plt.close(fig)
 
 
 # Analyse le prix moyen par categorie de produit / categorie d'usage
-def plot_bar_price(category, name, image_name):
-    df_final = pd.read_csv('data/final_herb_products.csv')
-    df_exploded = df_final.copy()
-    df_exploded[category] = df_exploded[category].str.split(';')
-    df_exploded = df_exploded.explode(category)
-    df_exploded[category] = df_exploded[category].str.strip()  
-
+def bar_price_chart(name, stats):
+    """Bar chart figure of the mean price per category, from the category stats."""
+    apply_theme()
     df_mean = (
-        df_exploded.groupby(category)
-        .agg({'Price (€)': 'mean'})
+        stats[['mean']].rename(columns={'mean': 'Price (€)'})
+        .dropna()
         .sort_values(by='Price (€)', ascending=False)
     )
 
@@ -95,24 +106,22 @@ def plot_bar_price(category, name, image_name):
     ax.grid(axis='both', linestyle='--', alpha=0.5)
     plt.xticks(rotation=45, ha='right')
     plt.tight_layout()
+    return fig
+
+
+def plot_bar_price(category, name, image_name, aggregates=None):
+    fig = bar_price_chart(name, herbal_stats(category, aggregates))
     fig.savefig(image_name, dpi=300)
+    import streamlit as st
     st.pyplot(fig)
+    plt.close(fig)
 
 
 # Heatmap des 2 categories
-def plot_heatmap(image_name):
-    df_final = pd.read_csv('data/final_herb_products.csv')
-    df_exploded = df_final.copy()
-    df_exploded = df_exploded.assign(
-        Product_category_exploded = df_exploded['Product category'].str.split('; '),
-        Use_category_exploded = df_exploded['Use category'].str.split('; ')
-    ).explode('Product_category_exploded').explode('Use_category_exploded')
-
-
-    heatmap_data = pd.crosstab(
-        df_exploded['Product_category_exploded'],
-        df_exploded['Use_category_exploded']
-    )
+def heatmap_chart(stats):
+    """Heatmap figure of the products per (product category, use category) cell stats."""
+    apply_theme()
+    heatmap_data = stats['count'].unstack(fill_value=0).sort_index().sort_index(axis=1)
 
     fig, ax = plt.subplots(figsize=(12, 8))
     sns.heatmap(heatmap_data, annot=True, fmt="d", cmap="YlGnBu", ax=ax)
@@ -122,8 +131,15 @@ def plot_heatmap(image_name):
     ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha='right')
     ax.set_yticklabels(ax.get_yticklabels(), rotation=0)
     plt.tight_layout()
+    return fig
+
+
+def plot_heatmap(image_name, aggregates=None):
+    fig = heatmap_chart(herbal_stats('cell', aggregates))
     fig.savefig(image_name, dpi=300)
+    import streamlit as st
     st.pyplot(fig)
+    plt.close(fig)
 
 
 
@@ -0,0 +1,234 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Export des neuf graphiques du tableau de bord en PNG, dans un pool
+    de processus (backend Agg, sans interface). Chaque figure est fermée
+    dès qu'elle est rendue ; un manifeste (empreinte des agrégats et des
+    paramètres de chaque graphique) évite de re-rendre les graphiques
+    inchangés. start_export() lance l'export dans un thread, hors du
+    thread de rendu de Streamlit.
+-------------------------------------------------
+"""
+
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .aggregates import AGGREGATES_CSV, ensure_aggregates, select
+from .storage import data_digest, read_table, write_if_changed
+
+# ======================
+# CONFIG
+# ======================
+IMAGES_DIR = Path(__file__).resolve().parent.parent / "demo" / "images"
+MANIFEST_PATH = Path(__file__).resolve().parent.parent / "data" / "cache" / "charts.json"
+EXPORT_DPI = 300
+EXPORT_WORKERS = os.cpu_count() or 1
+
+
+# ======================
+# CHARTS
+# ======================
+# fonctions de construction au niveau du module : le processus de rendu
+# ne reçoit que le nom du graphique
+def food_eq_products(aggregates):
+    from .analyse_equipement import compare_chart
+    return compare_chart(select(aggregates, 'herbal', 'all')['count'].sum(),
+                         select(aggregates, 'equipment', 'all')['count'].sum())
+
+
+def equipment_chart(aggregates, kind):
+    from .analyse_equipement import bar_chart, box_chart, pei_chart
+    build = {'pie': pei_chart, 'bar': bar_chart, 'box': box_chart}[kind]
+    return build(select(aggregates, 'equipment', 'Product category'))
+
+
+def herbal_pie(aggregates, category, title):
+    from .analyse_herbal import pie_categorie_chart
+    return pie_categorie_chart(title, select(aggregates, 'herbal', category))
+
+
+def herbal_bar_price(aggregates, category, title):
+    from .analyse_herbal import bar_price_chart
+    return bar_price_chart(title, select(aggregates, 'herbal', category))
+
+
+def herbal_heatmap(aggregates):
+    from .analyse_herbal import heatmap_chart
+    return heatmap_chart(select(aggregates, 'herbal', 'cell'))
+
+
+@dataclass(frozen=True)
+class Chart:
+    name: str                 # nom du PNG, sans extension
+    build: Callable           # build(aggregates, *params) -> Figure
+    params: Tuple = ()
+    savefig: Tuple = ()       # options de savefig, en plus de dpi
+
+    def figure(self, aggregates):
+        return self.build(aggregates, *self.params)
+
+
+TIGHT = (('bbox_inches', 'tight'),)
+
+CHARTS: List[Chart] = [
+    Chart("food_eq_products", food_eq_products, savefig=TIGHT),
+    Chart("equipements_pei_category", equipment_chart, ('pie',), TIGHT),
+    Chart("equipements_bar_price", equipment_chart, ('bar',)),
+    Chart("equipements_plotbox_price", equipment_chart, ('box',)),
+    Chart("herbal_cate_product", herbal_pie,
+          ("Product category", "Catégories de produits de plantes"), TIGHT),
+    Chart("herbal_cate_use", herbal_pie,
+          ("Use category", "Catégories d'usage des produits de plantes"), TIGHT),
+    Chart("herbal_price_product", herbal_bar_price,
+          ("Product category", 'Prix moyen par catégorie de produit')),
+    Chart("herbal_price_use", herbal_bar_price,
+          ("Use category", 'Prix moyen par catégorie des usages de produit')),
+    Chart("herbal_heatmap", herbal_heatmap),
+]
+CHARTS_BY_NAME = {chart.name: chart for chart in CHARTS}
+
+
+# ======================
+# RENDERING (worker)
+# ======================
+_aggregates = None
+
+
+def _init_worker(aggregates_csv: str) -> None:
+    import matplotlib
+    matplotlib.use("Agg")
+    global _aggregates
+    _aggregates = read_table(aggregates_csv)
+
+
+def render_chart(name: str, dpi: int = EXPORT_DPI, aggregates=None) -> bytes:
+    """PNG bytes of one chart; the figure is closed before returning."""
+    import matplotlib.pyplot as plt
+
+    chart = CHARTS_BY_NAME[name]
+    fig = chart.figure(_aggregates if aggregates is None else aggregates)
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=dpi, **dict(chart.savefig))
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+# ======================
+# EXPORT
+# ======================
+def chart_key(chart: Chart, data: str, dpi: int) -> str:
+    """What a chart's PNG depends on: data, parameters and options."""
+    spec = json.dumps([chart.name, data, list(chart.params), list(chart.savefig), dpi])
+    return hashlib.sha256(spec.encode()).hexdigest()
+
+
+def load_manifest(path: Path = MANIFEST_PATH) -> Dict[str, str]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest: Dict[str, str], path: Path = MANIFEST_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def export_charts(output_dir=IMAGES_DIR, names: Optional[List[str]] = None,
+                  dpi: int = EXPORT_DPI, workers: int = EXPORT_WORKERS,
+                  force: bool = False) -> Dict[str, str]:
+    """
+    Write the dashboard charts as <output_dir>/<name>.png.
+    Charts whose key is unchanged since the last export and whose file
+    still exists are skipped (unless force). Returns {name: "rendered" |
+    "unchanged"}.
+    """
+    ensure_aggregates()
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    data = data_digest([AGGREGATES_CSV])
+    manifest = load_manifest()
+
+    status = {}
+    todo = []
+    for chart in (CHARTS_BY_NAME[name] for name in names or CHARTS_BY_NAME):
+        image = str(output_dir / f"{chart.name}.png")
+        key = chart_key(chart, data, dpi)
+        if not force and manifest.get(image) == key and os.path.exists(image):
+            status[chart.name] = "unchanged"
+        else:
+            todo.append((chart, image, key))
+
+    if todo:
+        if workers > 1 and len(todo) > 1:
+            # spawn : start_export tourne dans un thread du serveur Streamlit,
+            # un fork d'un processus multithreadé peut bloquer sur un verrou hérité
+            with ProcessPoolExecutor(max_workers=min(workers, len(todo)),
+                                     mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_worker,
+                                     initargs=(AGGREGATES_CSV,)) as procs:
+                pngs = list(procs.map(render_chart, [c.name for c, _, _ in todo],
+                                      [dpi] * len(todo)))
+        else:
+            aggregates = read_table(AGGREGATES_CSV)
+            pngs = [render_chart(c.name, dpi, aggregates) for c, _, _ in todo]
+
+        for (chart, image, key), png in zip(todo, pngs):
+            write_if_changed(image, png)
+            manifest[image] = key
+            status[chart.name] = "rendered"
+        save_manifest(manifest)
+
+    return status
+
+
+_export_lock = threading.Lock()
+
+
+def start_export(**kwargs) -> Optional[threading.Thread]:
+    """
+    Run export_charts in a background thread, so the dashboard is not
+    blocked; does nothing if an export is already running.
+    """
+    if not _export_lock.acquire(blocking=False):
+        return None
+
+    def run():
+        try:
+            export_charts(**kwargs)
+        finally:
+            _export_lock.release()
+
+    thread = threading.Thread(target=run, name="chart-export", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export the dashboard charts as PNG")
+    parser.add_argument("--output-dir", default=str(IMAGES_DIR))
+    parser.add_argument("--workers", type=int, default=EXPORT_WORKERS)
+    parser.add_argument("--force", action="store_true", help="re-render unchanged charts")
+    args = parser.parse_args()
+    for name, state in export_charts(args.output_dir, workers=args.workers,
+                                     force=args.force).items():
+        print(f"{name}: {state}")
@@ -0,0 +1,69 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Journal de reprise du crawl : chaque page de listing terminée
+    (URL, résultat du parsing, empreinte) est ajoutée à un fichier
+    NDJSON. Un run lancé avec --resume rejoue ces pages sans requête
+    et ne récupère que le travail restant. Le journal est supprimé
+    quand le run se termine correctement.
+-------------------------------------------------
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .http_cache import CACHE_DIR, Page
+
+
+class CrawlJournal:
+    """
+    Append-only journal of the completed listing pages of one scraper.
+    resume=False starts a new journal; resume=True replays the pages
+    completed by the interrupted run.
+    """
+
+    def __init__(self, name: str, resume: bool = False, directory: Path = CACHE_DIR):
+        self.path = Path(directory) / f"{name}.journal.ndjson"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.entries: Dict[str, Dict] = {}
+
+        if resume and self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break    # dernière ligne tronquée par l'interruption
+                    self.entries[entry["url"]] = entry
+            print(f"[RESUME] {len(self.entries)} pages already done in {self.path}")
+
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+
+    def replay(self, url: str) -> Optional[Page]:
+        """The completed page for url, without its body, or None."""
+        entry = self.entries.get(url)
+        if entry is None:
+            return None
+        return Page(url, b"", from_cache=True, parsed=entry["parsed"],
+                    digest=bytes.fromhex(entry["digest"]))
+
+    def record(self, url: str, parsed: Any, digest: bytes) -> None:
+        """Journal a completed page; flushed so it survives a crash."""
+        line = {"url": url, "parsed": parsed, "digest": digest.hex()}
+        self._file.write(json.dumps(line, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def clear(self) -> None:
+        """The run succeeded: nothing left to resume."""
+        self.close()
+        if self.path.exists():
+            os.remove(self.path)
@@ -0,0 +1,398 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Moteur de crawl concurrent partagé par les deux scrapers.
+    Les unités de travail (une catégorie ou une page) sont exécutées
+    dans un pool de threads borné, avec un débit par hôte adaptatif
+    (AIMD) conservé d'un run à l'autre.
+    Les résultats sont renvoyés dans l'ordre des unités soumises,
+    la sortie reste donc déterministe.
+    fetch_and_parse() sépare le réseau du parsing : les threads d'I/O
+    récupèrent les pages, un pool de processus les parse ; ce pool est
+    démarré une fois par run et partagé par tous les crawls.
+-------------------------------------------------
+"""
+
+import atexit
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .metrics import METRICS, PARSE_BUCKETS
+
+# ======================
+# CONFIG
+# ======================
+MAX_CONCURRENCY = 8      # nombre maximal d'unités traitées en même temps
+HOST_RATE_LIMIT = 4.0    # requêtes par seconde au premier crawl d'un hôte
+MIN_HOST_RATE = 0.5      # bornes du débit adaptatif, par hôte
+MAX_HOST_RATE = 20.0
+RATE_INCREASE = 0.5      # hausse additive : +0.5 requête/s par seconde de crawl sans erreur
+RATE_DECREASE = 0.5      # baisse multiplicative sur 429 / 5xx / latence
+LATENCY_FACTOR = 2.0     # latence lissée > 2 x la latence de référence = surcharge
+LATENCY_SMOOTHING = 0.2  # poids de la dernière réponse dans la latence lissée
+DECREASE_WINDOW = 1.0    # secondes minimum entre deux baisses
+RATE_STATE_PATH = Path(__file__).resolve().parent.parent / "data" / "cache" / "rate_limits.json"
+PARSE_WORKERS = os.cpu_count() or 1   # processus de parsing (0 = parsing dans le thread principal)
+PARSE_QUEUE_SIZE = 32    # pages récupérées en attente de parsing au maximum
+# démarrage des processus de parsing, sans hériter des threads du crawl
+PARSE_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+# site crawlé : CALEBASSE_BASE_URL (ou --base-url) pointe les scrapers vers
+# un autre serveur, par exemple le serveur local benchmarks/mock_server.py
+BASE_URL = os.environ.get("CALEBASSE_BASE_URL", "https://calebasse.com")
+
+
+def site_url(path: str, base_url: Optional[str] = None) -> str:
+    """Absolute URL of a site path ("/en/thes") on base_url (BASE_URL by default)."""
+    return (base_url or BASE_URL).rstrip("/") + path
+
+
+# ======================
+# RATE LIMIT
+# ======================
+@dataclass
+class HostRate:
+    rate: float                      # requêtes par seconde autorisées
+    latency: Optional[float] = None  # latence lissée (EWMA) des réponses
+    baseline: Optional[float] = None # latence de référence, quand l'hôte n'est pas chargé
+    next_slot: float = 0.0
+    last_decrease: float = 0.0
+    last_increase: float = 0.0
+    last_error: float = 0.0
+
+
+class AdaptiveRateLimiter:
+    """
+    Per-host AIMD request rate. Each caller reserves the next free slot
+    of its host (1 / rate seconds apart), then sleeps outside the lock.
+    record() adapts the rate to the responses: the rate grows by
+    RATE_INCREASE request/s per second without error (linear in time,
+    whatever the rate), a 429/5xx, a
+    network error or a latency above LATENCY_FACTOR times the baseline
+    multiplies it by RATE_DECREASE (once per window, concurrent failures
+    count as one congestion signal). The rates are saved between runs so
+    a crawl starts at the last rate the host accepted.
+    fixed_rate disables the adaptation (0 = no limit).
+    """
+
+    def __init__(self, path: Path = RATE_STATE_PATH, initial_rate: float = HOST_RATE_LIMIT,
+                 min_rate: float = MIN_HOST_RATE, max_rate: float = MAX_HOST_RATE,
+                 fixed_rate: Optional[float] = None):
+        self.path = Path(path)
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.fixed_rate = fixed_rate
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, HostRate] = {}
+        self._saved: Optional[Dict[str, Dict]] = None
+
+    def _host(self, host: str) -> HostRate:
+        """State of host, the saved rate on first use (caller holds the lock)."""
+        state = self._hosts.get(host)
+        if state is None:
+            if self._saved is None:
+                try:
+                    with open(self.path, encoding="utf-8") as f:
+                        self._saved = json.load(f)
+                except (OSError, ValueError):
+                    self._saved = {}
+            saved = self._saved.get(host, {})
+            rate = min(self.max_rate, max(self.min_rate, saved.get("rate", self.initial_rate)))
+            state = self._hosts[host] = HostRate(rate, baseline=saved.get("baseline"))
+        return state
+
+    def rate(self, url_or_host: str) -> float:
+        host = urlsplit(url_or_host).netloc or url_or_host
+        with self._lock:
+            return self.fixed_rate if self.fixed_rate is not None else self._host(host).rate
+
+    def wait(self, url: str) -> None:
+        host = urlsplit(url).netloc
+        with self._lock:
+            state = self._host(host)
+            rate = self.fixed_rate if self.fixed_rate is not None else state.rate
+            if rate <= 0:
+                return
+            now = time.monotonic()
+            slot = max(now, state.next_slot)
+            state.next_slot = slot + 1.0 / rate
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, url: str, latency: float, status: Optional[int],
+               retry_after: Optional[float] = None) -> None:
+        """
+        Adapt the rate of url's host to a response (status None: network
+        error). retry_after also holds back the host's next request.
+        """
+        if self.fixed_rate is not None:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            state = self._host(host)
+            now = time.monotonic()
+            if retry_after:
+                state.next_slot = max(state.next_slot, now + retry_after)
+
+            overloaded = status is None or status == 429 or status >= 500
+            if not overloaded:
+                state.latency = (latency if state.latency is None
+                                 else LATENCY_SMOOTHING * latency
+                                 + (1 - LATENCY_SMOOTHING) * state.latency)
+                if state.baseline is None or state.latency < state.baseline:
+                    state.baseline = state.latency
+                overloaded = state.latency > LATENCY_FACTOR * state.baseline
+
+            if overloaded:
+                state.last_error = now
+                # une seule baisse par fenêtre : les requêtes déjà en vol
+                # au moment de la congestion ne la comptent pas plusieurs fois
+                window = max(DECREASE_WINDOW, 1.0 / state.rate)
+                if now - state.last_decrease < window:
+                    return
+                state.rate = max(self.min_rate, state.rate * RATE_DECREASE)
+                state.last_decrease = now
+                if state.latency is not None and state.baseline is not None:
+                    # la latence de référence remonte doucement (charge du serveur variable)
+                    state.baseline += (state.latency - state.baseline) * LATENCY_SMOOTHING
+            else:
+                # hausse additive proportionnelle au temps écoulé depuis la
+                # dernière hausse ou la dernière erreur (au plus une seconde,
+                # après une pause), et non au nombre de réponses
+                since = max(state.last_increase, state.last_error)
+                elapsed = min(1.0, now - since) if since else 0.0
+                state.rate = min(self.max_rate, state.rate + RATE_INCREASE * elapsed)
+                state.last_increase = now
+            rate = state.rate
+        METRICS.set("host_request_rate", rate, host=host)
+
+    def save(self) -> None:
+        """Persist the current rate of every host used in this run."""
+        with self._lock:
+            saved = dict(self._saved or {})
+            for host, state in self._hosts.items():
+                saved[host] = {"rate": round(state.rate, 3),
+                               "baseline": round(state.baseline, 4) if state.baseline else None,
+                               "updated": datetime.now().isoformat(timespec="seconds")}
+            self._saved = saved
+            # sous le verrou : les deux scrapers peuvent enregistrer en même temps
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(saved, f, indent=2)
+            os.replace(tmp_path, self.path)
+        METRICS.log("host_rates", **{host: state["rate"] for host, state in saved.items()})
+
+
+RATE_LIMITER = AdaptiveRateLimiter()
+
+
+# ======================
+# ENGINE
+# ======================
+def crawl(
+    units: Iterable[Tuple],
+    worker: Callable[..., Any],
+    max_workers: int = MAX_CONCURRENCY,
+) -> List[Any]:
+    """
+    Call worker(*unit) for every unit concurrently.
+    Returns the results in the same order as units.
+    """
+    units = list(units)
+    if not units:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(units)))) as pool:
+        return list(pool.map(lambda unit: worker(*unit), units))
+
+
+_parse_pools: Dict[int, ProcessPoolExecutor] = {}
+_parse_pools_lock = threading.Lock()
+
+
+def parse_pool(parse_workers: int = PARSE_WORKERS) -> Optional[ProcessPoolExecutor]:
+    """
+    Process pool of the parse stage, started on first use and shared by
+    every crawl of the run (shut down at exit). None when parse_workers <= 0.
+    """
+    if parse_workers <= 0:
+        return None
+    with _parse_pools_lock:
+        procs = _parse_pools.get(parse_workers)
+        # un pool cassé (processus tué) est remplacé
+        if procs is None or getattr(procs, "_broken", False):
+            # pas de fork : le pool peut être (re)créé alors que les threads des
+            # crawls et la connexion SQLite du cache de pages sont actifs
+            procs = _parse_pools[parse_workers] = ProcessPoolExecutor(
+                max_workers=parse_workers, mp_context=multiprocessing.get_context(PARSE_START_METHOD))
+            procs.submit(int).result()
+        return procs
+
+
+@atexit.register
+def shutdown_parse_pools() -> None:
+    with _parse_pools_lock:
+        for procs in _parse_pools.values():
+            procs.shutdown(wait=True, cancel_futures=True)
+        _parse_pools.clear()
+
+
+def parse_pages(
+    texts: Iterable[str],
+    parse: Callable[[str], Any],
+    parse_workers: int = PARSE_WORKERS,
+) -> List[Any]:
+    """Parse already fetched pages in a process pool, keeping their order."""
+    texts = list(texts)
+    if parse_workers <= 0 or len(texts) <= 1:
+        return [parse(text) for text in texts]
+    return list(parse_pool(parse_workers).map(parse, texts))
+
+
+def timed_parse(parse: Callable[[str], Any], text: str) -> Tuple[Any, float]:
+    """parse(text) and its duration, measured in the process that parses."""
+    start = time.perf_counter()
+    parsed = parse(text)
+    return parsed, time.perf_counter() - start
+
+
+def fetch_and_parse(
+    units: Iterable[Tuple],
+    fetch: Callable[..., Any],
+    parse: Callable[[str], Any],
+    on_result: Optional[Callable[[Tuple, Any, Any], Any]] = None,
+    next_units: Optional[Callable[[Tuple, Any], Iterable[Tuple]]] = None,
+    on_group_done: Optional[Callable[[Any], None]] = None,
+    max_workers: int = MAX_CONCURRENCY,
+    parse_workers: int = PARSE_WORKERS,
+    queue_size: int = PARSE_QUEUE_SIZE,
+    name: str = "crawl",
+) -> Dict[Tuple, Any]:
+    """
+    Two-stage pipeline: I/O threads fetch pages, a process pool parses them.
+
+    fetch(*unit) returns a page (with .text and .parsed, the cached parse
+    or None) or None on failure; parse(text) runs in a worker process.
+    on_result(unit, page, parsed) gives the value kept for the unit
+    (parsed by default) and runs in the calling thread.
+    next_units(unit, parsed) returns follow-up units to fetch (pagination).
+    on_group_done(group) is called once every unit of a group (unit[0],
+    the category URL) and all its follow-ups are done.
+
+    At most queue_size fetched pages wait for their parse: I/O workers
+    block until the parse stage catches up, so memory stays bounded.
+    Pages, parse times and the crawl throughput are recorded in METRICS
+    under the crawl label name.
+    Returns {unit: value}; units whose fetch failed map to None.
+    """
+    units = list(units)
+    results: Dict[Tuple, Any] = {}
+    if not units:
+        return results
+
+    slots = threading.BoundedSemaphore(queue_size)
+    events: "queue.Queue[Tuple[str, Tuple, Any]]" = queue.Queue()
+    stopping = threading.Event()
+
+    def io_task(unit: Tuple) -> None:
+        while not slots.acquire(timeout=0.1):
+            if stopping.is_set():
+                return
+        try:
+            events.put(("fetched", unit, fetch(*unit)))
+        except BaseException as e:
+            events.put(("error", unit, e))
+
+    # le pool de processus (partagé entre les crawls) est démarré avant les threads d'I/O
+    procs = parse_pool(parse_workers)
+    parsing = set()
+    io_pool = ThreadPoolExecutor(max_workers=max(1, max_workers))
+
+    outstanding = 0
+    group_pending: Dict[Any, int] = {}
+    pages = failed = 0
+    start = time.perf_counter()
+
+    def submit(unit: Tuple) -> None:
+        nonlocal outstanding
+        outstanding += 1
+        group_pending[unit[0]] = group_pending.get(unit[0], 0) + 1
+        io_pool.submit(io_task, unit)
+
+    def parsed_in(unit: Tuple, page: Any, parsed: Any, seconds: float) -> None:
+        METRICS.observe("page_parse_seconds", seconds, PARSE_BUCKETS, crawl=name)
+        finish(unit, page, parsed)
+
+    def finish(unit: Tuple, page: Any, parsed: Any) -> None:
+        nonlocal outstanding, pages, failed
+        slots.release()
+        outstanding -= 1
+        if page is None:
+            failed += 1
+            results[unit] = None
+        else:
+            pages += 1
+            results[unit] = on_result(unit, page, parsed) if on_result else parsed
+            if next_units is not None:
+                for follow in next_units(unit, parsed):
+                    submit(follow)
+        group_pending[unit[0]] -= 1
+        if group_pending[unit[0]] == 0 and on_group_done is not None:
+            on_group_done(unit[0])
+
+    try:
+        for unit in units:
+            submit(unit)
+
+        while outstanding:
+            kind, unit, payload = events.get()
+            if kind == "error":
+                raise payload
+            if kind == "parsed":
+                page, future = payload
+                parsing.discard(future)
+                parsed_in(unit, page, *future.result())
+                continue
+
+            page = payload
+            if page is None:
+                finish(unit, None, None)
+            elif page.parsed is not None:
+                finish(unit, page, page.parsed)
+            elif procs is None:
+                parsed_in(unit, page, *timed_parse(parse, page.text))
+            else:
+                future = procs.submit(timed_parse, parse, page.text)
+                parsing.add(future)
+                future.add_done_callback(
+                    lambda f, unit=unit, page=page: events.put(("parsed", unit, (page, f)))
+                )
+    finally:
+        stopping.set()
+        io_pool.shutdown(wait=True, cancel_futures=True)
+        # le pool reste ouvert pour le crawl suivant : seuls nos parsings en attente sont annulés
+        for future in parsing:
+            future.cancel()
+
+    seconds = time.perf_counter() - start
+    METRICS.inc("pages_total", pages, crawl=name, result="ok")
+    METRICS.inc("pages_total", failed, crawl=name, result="failed")
+    METRICS.set("crawl_pages_per_second", pages / seconds if seconds else 0, crawl=name)
+    METRICS.log("crawl", crawl=name, pages=pages, failed=failed, seconds=round(seconds, 3),
+                pages_per_second=round(pages / seconds, 2) if seconds else None)
+    return results
@@ -0,0 +1,76 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Cache du tableau de bord Streamlit. Les tables sont chargées avec
+    st.cache_data, par empreinte (hash) des fichiers ; chaque graphique
+    est rendu une fois en PNG, mis en cache selon l'empreinte de ses
+    données et ses paramètres, et l'image n'est réécrite sur le disque
+    que si son contenu change. Une relance sans changement ne lit
+    aucune table et ne construit aucune figure.
+-------------------------------------------------
+"""
+
+import io
+from typing import Callable, Iterable, Tuple
+
+import matplotlib.pyplot as plt
+import streamlit as st
+
+from .storage import data_digest, read_table, write_if_changed
+
+# ======================
+# CONFIG
+# ======================
+# résolution de l'affichage : une image plus large que la page serait
+# redimensionnée par st.image à chaque relance
+DISPLAY_DPI = 100
+
+# ======================
+# DATA
+# ======================
+@st.cache_data(show_spinner=False)
+def _load_table(path: str, digest: str):
+    return read_table(path)
+
+
+def load_table(path):
+    """read_table cached by st.cache_data until the file content changes."""
+    return _load_table(str(path), data_digest([path]))
+
+
+# ======================
+# FIGURES
+# ======================
+@st.cache_data(show_spinner=False, max_entries=64)
+def _render(chart: str, digest: str, params: Tuple, savefig: Tuple,
+            _build: Callable) -> bytes:
+    # _build n'entre pas dans la clé du cache (préfixe « _ »)
+    fig = _build()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", **dict(savefig))
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def show_chart(chart: str, sources: Iterable, build: Callable, params: Tuple = (),
+               image_name=None, dpi: int = 300, **savefig) -> bytes:
+    """
+    Display a chart from its cached PNG.
+    build() returns the matplotlib figure and is only called when the
+    data of sources (pipeline table paths) or params changed; params
+    must hold every argument build depends on besides the data.
+    The PNG is also saved at dpi to image_name when its content changed;
+    the dashboard shows a DISPLAY_DPI rendering.
+    """
+    digest = data_digest(sources)
+    png = None
+    if image_name:
+        options = tuple(sorted({**savefig, "dpi": dpi}.items()))
+        png = _render(chart, digest, tuple(params), options, build)
+        write_if_changed(image_name, png)
+    options = tuple(sorted({**savefig, "dpi": DISPLAY_DPI}.items()))
+    st.image(_render(chart, digest, tuple(params), options, build))
+    return png
@@ -0,0 +1,174 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Cache HTTP persistant (SQLite) placé sous les appels fetch() des
+    scrapers. Les pages sont stockées compressées avec leurs en-têtes
+    ETag / Last-Modified ; les requêtes suivantes sont conditionnelles
+    et une réponse 304 réutilise le corps et le résultat du parsing
+    déjà en cache. La taille du cache est bornée (éviction LRU).
+-------------------------------------------------
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from .http_client import fetch
+from .metrics import METRICS
+
+# ======================
+# CONFIG
+# ======================
+CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "cache"
+CACHE_PATH = CACHE_DIR / "http_cache.sqlite"
+MAX_CACHE_BYTES = 64 * 1024 * 1024   # taille maximale des corps compressés
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url           TEXT PRIMARY KEY,
+    body          BLOB NOT NULL,
+    size          INTEGER NOT NULL,
+    encoding      TEXT,
+    etag          TEXT,
+    last_modified TEXT,
+    parsed        TEXT,
+    fetched_at    REAL NOT NULL,
+    accessed_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at);
+"""
+
+
+@dataclass
+class Page:
+    url: str
+    content: bytes
+    encoding: str = "utf-8"
+    from_cache: bool = False     # corps servi depuis le cache (304 ou max-age)
+    parsed: Any = None           # parsing mis en cache, None s'il faut reparser
+    digest: Optional[bytes] = None   # empreinte du corps quand il n'est pas gardé (reprise)
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+# ======================
+# CACHE
+# ======================
+class PageCache:
+    """
+    URL-keyed on-disk page cache with conditional GET and LRU eviction.
+    max_age (seconds): entries younger than this are served without
+    any request; None always revalidates with the server.
+    """
+
+    def __init__(self, path: Path = CACHE_PATH, max_bytes: int = MAX_CACHE_BYTES,
+                 max_age: Optional[float] = None):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def _lookup(self, url: str):
+        with self._lock:
+            return self._connect().execute(
+                "SELECT body, encoding, etag, last_modified, parsed, fetched_at "
+                "FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+
+    def _touch(self, url: str, refreshed: bool) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            if refreshed:
+                conn.execute("UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                             (now, now, url))
+            else:
+                conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (now, url))
+            conn.commit()
+
+    def _store(self, url: str, content: bytes, encoding: str, etag, last_modified) -> None:
+        body = zlib.compress(content, 6)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, NULL, ?, ?)",
+                (url, body, len(body), encoding, etag, last_modified, now, now),
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in conn.execute(
+            "SELECT url, size FROM pages ORDER BY accessed_at"
+        ).fetchall():
+            conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def get(self, url: str, parser: str = "") -> Page:
+        """
+        Fetch url, revalidating the cached copy when there is one.
+        Page.parsed is only filled with a parse stored under the same parser name.
+        """
+        entry = self._lookup(url)
+        headers = {}
+
+        if entry is not None:
+            body, encoding, etag, last_modified, parsed, fetched_at = entry
+            parsed = json.loads(parsed) if parsed else {}
+            cached = Page(url, zlib.decompress(body), encoding, True,
+                          parsed.get("data") if parsed.get("parser") == parser else None)
+            if self.max_age is not None and time.time() - fetched_at < self.max_age:
+                self._touch(url, refreshed=False)
+                METRICS.inc("page_cache_total", result="fresh")
+                return cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        response = fetch(url, headers=headers or None)
+        if response.status_code == 304 and entry is not None:
+            self._touch(url, refreshed=True)
+            METRICS.inc("page_cache_total", result="not_modified")
+            return cached
+        METRICS.inc("page_cache_total", result="fetched")
+
+        self._store(url, response.content, response.encoding,
+                    response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return Page(url, response.content, response.encoding or "utf-8")
+
+    def store_parsed(self, url: str, parsed: Any, parser: str = "") -> None:
+        """Attach the parse result of url so a later 304 can skip parsing."""
+        parsed = {"parser": parser, "data": parsed}
+        with self._lock:
+            conn = self._connect()
+            conn.execute("UPDATE pages SET parsed = ? WHERE url = ?",
+                         (json.dumps(parsed, ensure_ascii=False), url))
+            conn.commit()
+
+
+PAGE_CACHE = PageCache()
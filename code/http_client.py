@@ -0,0 +1,146 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Couche HTTP partagée par les deux scrapers : une session unique
+    avec pool de connexions keep-alive et compression, et une fonction
+    fetch() qui réessaie les erreurs transitoires (429 / 5xx / réseau)
+    avec un backoff exponentiel + jitter, en respectant Retry-After.
+    Chaque réponse règle le débit adaptatif de son hôte (RATE_LIMITER).
+-------------------------------------------------
+"""
+
+import random
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .crawler import RATE_LIMITER, MAX_CONCURRENCY
+from .metrics import METRICS
+
+# ======================
+# CONFIG
+# ======================
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15"
+    ),
+    "Accept-Encoding": "gzip, deflate",
+}
+
+TIMEOUT = 10
+MAX_RETRIES = 4          # nombre de nouvelles tentatives après le premier essai
+BACKOFF_BASE = 0.5       # secondes, doublé à chaque tentative
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+try:
+    import brotli  # noqa: F401  (urllib3 décode br si le module est présent)
+    HEADERS["Accept-Encoding"] += ", br"
+except ImportError:
+    pass
+
+
+# ======================
+# SESSION
+# ======================
+def make_session(pool_size: int = MAX_CONCURRENCY) -> requests.Session:
+    """Session with a keep-alive pool large enough for every crawl worker."""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+SESSION = make_session()
+
+
+# ======================
+# RETRY
+# ======================
+def retry_after_delay(response: requests.Response) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date) into a delay."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def fetch(
+    url: str,
+    session: Optional[requests.Session] = None,
+    timeout: float = TIMEOUT,
+    max_retries: int = MAX_RETRIES,
+    headers: Optional[dict] = None,
+) -> requests.Response:
+    """
+    GET url through the shared session.
+    Retries 429/5xx and network errors, then raises requests.RequestException.
+    Each attempt is timed in the http_request_duration_seconds histogram.
+    """
+    session = session or SESSION
+    host = urlsplit(url).netloc
+    attempt = 0
+
+    while True:
+        RATE_LIMITER.wait(url)
+        start = time.perf_counter()
+        try:
+            response = session.get(url, timeout=timeout, headers=headers)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            elapsed = time.perf_counter() - start
+            METRICS.observe("http_request_duration_seconds", elapsed, host=host, status="error")
+            RATE_LIMITER.record(url, elapsed, None)
+            if attempt >= max_retries:
+                raise
+            delay = backoff_delay(attempt)
+            METRICS.inc("http_retries_total", host=host, reason=type(e).__name__)
+            print(f"[RETRY] {url}: {e} (retry in {delay:.1f}s)")
+        else:
+            size = len(response.content)
+            elapsed = time.perf_counter() - start
+            METRICS.observe("http_request_duration_seconds", elapsed,
+                            host=host, status=response.status_code)
+            METRICS.inc("http_response_bytes_total", size, host=host)
+            retry_after = (retry_after_delay(response)
+                           if response.status_code in RETRY_STATUSES else None)
+            # débit adaptatif de l'hôte : hausse si la réponse est saine, baisse sinon
+            RATE_LIMITER.record(url, elapsed, response.status_code, retry_after)
+            if response.status_code not in RETRY_STATUSES or attempt >= max_retries:
+                response.raise_for_status()
+                if "charset" not in response.headers.get("Content-Type", ""):
+                    response.encoding = "utf-8"
+                return response
+            delay = retry_after
+            if delay is None:
+                delay = backoff_delay(attempt)
+            delay = min(delay, BACKOFF_MAX)
+            METRICS.inc("http_retries_total", host=host, reason=response.status_code)
+            print(f"[RETRY] {url}: HTTP {response.status_code} (retry in {delay:.1f}s)")
+
+        attempt += 1
+        time.sleep(delay)
@@ -0,0 +1,69 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Identité stable des produits : le "handle" de l'URL de la fiche
+    produit (/en/products/<handle>), relevé sur chaque carte du listing.
+    Les fusions et dédoublonnages se font sur cette clé (jointures par
+    hachage) ; les noms affichés ne servent plus que de repli pour les
+    tables scrappées avant l'ajout de la colonne "Product ID".
+-------------------------------------------------
+"""
+
+import re
+from typing import Iterable, List, Optional
+from urllib.parse import unquote, urlsplit
+
+import pandas as pd
+
+# ======================
+# CONFIG
+# ======================
+PRODUCT_ID = 'Product ID'
+PRODUCT_PATH = re.compile(r"/products/([^/?#]+)")
+
+
+# ======================
+# HANDLE
+# ======================
+def product_handle(href: Optional[str]) -> Optional[str]:
+    """
+    "/en/products/ginseng-root-100g?variant=1" -> "ginseng-root-100g";
+    other links give their last path segment, None without a link.
+    """
+    if not href:
+        return None
+    match = PRODUCT_PATH.search(href)
+    if match:
+        return unquote(match.group(1))
+    segment = urlsplit(href).path.rstrip('/').rsplit('/', 1)[-1]
+    return unquote(segment) or None
+
+
+# ======================
+# KEYS
+# ======================
+def product_ids(df: pd.DataFrame) -> pd.Series:
+    """Product ID of each row, NA when the table or the row has none."""
+    if PRODUCT_ID not in df:
+        return pd.Series(pd.NA, index=df.index, dtype=object)
+    ids = df[PRODUCT_ID].astype(object)
+    return ids.where(ids.notna() & (ids != ''), pd.NA)
+
+
+def product_key(df: pd.DataFrame, fallback: pd.Series) -> pd.Series:
+    """Product ID of each row, fallback (e.g. the name) for rows without one."""
+    return product_ids(df).fillna(fallback.astype(object))
+
+
+def identity_keys(frames: Iterable[Optional[pd.DataFrame]], keys: List[str]) -> List[str]:
+    """
+    keys with "Product name" replaced by "Product ID" when every given
+    table has an ID for each row (snapshot comparisons).
+    """
+    frames = [df for df in frames if df is not None]
+    if frames and all(product_ids(df).notna().all() for df in frames):
+        return [PRODUCT_ID if key == 'Product name' else key for key in keys]
+    return keys
@@ -0,0 +1,149 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Outils du mode incrémental : empreinte (hash) des pages de chaque
+    catégorie pour détecter les catégories inchangées, et fichier delta
+    (produits ajoutés / supprimés / prix modifiés) écrit à côté de
+    chaque instantané brut.
+-------------------------------------------------
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+# ======================
+# CONFIG
+# ======================
+CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "cache"
+FINGERPRINTS_PATH = CACHE_DIR / "fingerprints.json"
+_save_lock = threading.Lock()
+
+
+# ======================
+# FINGERPRINTS
+# ======================
+def page_digest(body: bytes) -> bytes:
+    """Content hash of one page, small enough to keep instead of the body."""
+    return hashlib.sha256(body).digest()
+
+
+def fingerprint(page_digests: Iterable[bytes]) -> str:
+    """Content hash of a category, from the page_digest of its listing pages."""
+    digest = hashlib.sha256()
+    for page in page_digests:
+        digest.update(page)
+    return digest.hexdigest()
+
+
+class ChangeTracker:
+    """
+    Per-category fingerprints persisted between runs, keyed by category URL.
+    save() only writes the fingerprints updated by this tracker over the
+    file's current content, so the two scrapers can run at the same time.
+    """
+
+    def __init__(self, path: Path = FINGERPRINTS_PATH):
+        self.path = Path(path)
+        self.fingerprints = self._load()
+        self.updated = {}
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def is_unchanged(self, key: str, digest: str) -> bool:
+        return self.fingerprints.get(key) == digest
+
+    def update(self, key: str, digest: str) -> None:
+        self.fingerprints[key] = digest
+        self.updated[key] = digest
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with _save_lock:
+            fingerprints = {**self._load(), **self.updated}
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(fingerprints, f, indent=2)
+            os.replace(tmp_path, self.path)
+        self.fingerprints = fingerprints
+
+
+# ======================
+# DELTA
+# ======================
+def delta_path(snapshot_path) -> Path:
+    """data/raw_x.csv -> data/raw_x.delta.csv"""
+    snapshot_path = Path(snapshot_path)
+    return snapshot_path.with_name(f"{snapshot_path.stem}.delta.csv")
+
+
+def compute_delta(old: Optional[pd.DataFrame], new: pd.DataFrame,
+                  keys: List[str], price_col: str = 'Price (€)') -> pd.DataFrame:
+    """
+    Compare two snapshots on keys.
+    Returns one row per added, removed or price-changed product.
+    """
+    if old is None:
+        old = pd.DataFrame(columns=keys + [price_col])
+    old = old.drop_duplicates(keys)[keys + [price_col]]
+    new = new.drop_duplicates(keys)[keys + [price_col]]
+
+    merged = pd.merge(old, new, on=keys, how='outer',
+                      suffixes=('_old', '_new'), indicator=True)
+    old_price = pd.to_numeric(merged[f'{price_col}_old'], errors='coerce')
+    new_price = pd.to_numeric(merged[f'{price_col}_new'], errors='coerce')
+
+    changed = (merged['_merge'] == 'both') & (old_price != new_price) & ~(old_price.isna() & new_price.isna())
+    merged['Change'] = merged['_merge'].astype(str).map({'left_only': 'removed', 'right_only': 'added', 'both': ''})
+    merged.loc[changed, 'Change'] = 'price_changed'
+    merged['Old price'] = old_price
+    merged['New price'] = new_price
+
+    delta = merged[merged['Change'] != '']
+    return delta[['Change'] + keys + ['Old price', 'New price']].reset_index(drop=True)
+
+
+def write_delta(old: Optional[pd.DataFrame], new: pd.DataFrame, snapshot_path,
+                keys: List[str], price_col: str = 'Price (€)') -> pd.DataFrame:
+    """Compute the delta between two snapshots and save it next to the snapshot."""
+    delta = compute_delta(old, new, keys, price_col)
+    path = delta_path(snapshot_path)
+    delta.to_csv(path, index=False, encoding='utf-8-sig')
+    counts = delta['Change'].value_counts()
+    print(f"[DELTA] {path}: {counts.get('added', 0)} added, "
+          f"{counts.get('removed', 0)} removed, {counts.get('price_changed', 0)} price changed")
+    return delta
+
+
+def read_snapshot(snapshot_path) -> Optional[pd.DataFrame]:
+    """Previous snapshot, or None on the first run."""
+    if not os.path.exists(snapshot_path):
+        return None
+    return pd.read_csv(snapshot_path, encoding='utf-8-sig')
+
+
+def has_changes(snapshot_path) -> bool:
+    """
+    False only when the snapshot's delta is empty and up to date. A delta
+    older than the snapshot (rewritten since by a full scrape, which
+    writes no delta) says nothing about it.
+    """
+    path = delta_path(snapshot_path)
+    if not path.exists():
+        return True
+    if os.path.exists(snapshot_path) and path.stat().st_mtime_ns < os.stat(snapshot_path).st_mtime_ns:
+        return True
+    return len(pd.read_csv(path, encoding='utf-8-sig')) > 0
@@ -0,0 +1,157 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Extraction rapide des cartes produits d'une page de listing,
+    directement avec lxml et des XPath compilés, sans construire
+    l'arbre BeautifulSoup. Les résultats sont identiques à ceux de
+    scrap_herbal.parse_page et scrap_equipement.parse_physical_page,
+    qui restent les implémentations de référence.
+-------------------------------------------------
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple, Union
+
+import lxml.html
+from lxml import etree
+
+from .identity import product_handle
+
+# ======================
+# XPATH
+# ======================
+# classes exactes utilisées par scrap_herbal (BeautifulSoup compare la
+# valeur complète de l'attribut, espaces normalisés)
+HERBAL_TITLE_CLASS = ('product-card-title line-clamp-2 max-w-full font-medium underline-offset-2 '
+                      'group-hover:underline text-center text-sm @[200px]:text-base')
+HERBAL_PRICE_CLASS = 'product-card-price flex items-center gap-2 text-base font-medium @[200px]:text-lg'
+
+HERBAL_TITLES = etree.XPath(f'//div[normalize-space(@class) = "{HERBAL_TITLE_CLASS}"]')
+HERBAL_PRICES = etree.XPath(f'//div[normalize-space(@class) = "{HERBAL_PRICE_CLASS}"]')
+
+# re.compile("^product-card @container") ne peut correspondre qu'à la
+# valeur complète de l'attribut class
+PHYSICAL_CARDS = etree.XPath('//div[starts-with(normalize-space(@class), "product-card @container")]')
+PHYSICAL_TITLE = etree.XPath('(.//div[contains(@class, "product-card-title")])[1]')
+
+# lien de la fiche produit : le <a> qui entoure le titre, sinon le
+# premier lien de la carte
+TITLE_LINK = etree.XPath('ancestor::a[@href][1]/@href')
+TITLE_CARD_LINK = etree.XPath(
+    '(ancestor::div[starts-with(normalize-space(@class), "product-card @container")][1]//a/@href)[1]')
+CARD_LINK = etree.XPath('(.//a/@href)[1]')
+
+FIRST_SPAN = etree.XPath('(.//span)[1]')
+TEXT_NODES = etree.XPath('.//text()')
+
+# mêmes sélecteurs que scrap_equipement.has_next_page
+NEXT_PAGE = etree.XPath(
+    '//a[normalize-space(@rel) = "next"]'
+    ' | //a[contains(concat(" ", normalize-space(@class), " "), " next ")]'
+    ' | //li[contains(concat(" ", normalize-space(@class), " "), " next ")]//a'
+)
+
+# liens de pagination : ...?page=N
+LINK_HREFS = etree.XPath('//a/@href')
+PAGE_PARAM = re.compile(r"[?&]page=(\d+)")
+
+
+# ======================
+# UTILS
+# ======================
+def parse_document(html: Union[str, bytes]) -> Optional[etree._Element]:
+    """Parse a page with lxml, None for an empty document."""
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+    if not html.strip():
+        return None
+    return lxml.html.document_fromstring(html)
+
+
+def text_of(element: etree._Element) -> str:
+    """Same result as BeautifulSoup's get_text(strip=True)."""
+    return "".join(s.strip() for s in TEXT_NODES(element) if s.strip())
+
+
+# ======================
+# PARSERS
+# ======================
+def pagination(root: etree._Element) -> Dict:
+    """
+    Page numbers linked from the pagination of a listing page,
+    and whether it has a next page (same selectors as has_next_page).
+    """
+    pages = {int(match.group(1)) for href in LINK_HREFS(root)
+             for match in [PAGE_PARAM.search(href)] if match}
+    return {"pages": sorted(pages), "has_next": bool(NEXT_PAGE(root))}
+
+
+def title_handle(title: etree._Element) -> Optional[str]:
+    """Product handle of the card holding a title div."""
+    href = TITLE_LINK(title) or TITLE_CARD_LINK(title)
+    return product_handle(href[0]) if href else None
+
+
+def herbal_items(root: etree._Element) -> List[Tuple[str, Optional[float], Optional[str]]]:
+    title_tags = HERBAL_TITLES(root)
+    price_tags = HERBAL_PRICES(root)
+
+    items = []
+    for i in range(len(title_tags)):
+        name = text_of(title_tags[i])
+        price_span = FIRST_SPAN(price_tags[i])
+        try:
+            price = float(text_of(price_span[0]).replace('€', '').replace(',', '.').strip())
+        except Exception:
+            price = None
+        items.append((name, price, title_handle(title_tags[i])))
+    return items
+
+
+def parse_herbal_listing(html: Union[str, bytes]) -> List[Tuple[str, Optional[float], Optional[str]]]:
+    """
+    Extract the products of a herbal listing page.
+    Returns a list of (name, price, handle), like scrap_herbal.parse_page.
+    """
+    root = parse_document(html)
+    if root is None:
+        return []
+    return herbal_items(root)
+
+
+def parse_herbal_page(html: Union[str, bytes]) -> Dict:
+    """
+    Herbal listing page with its pagination:
+    {"items": [(name, price, handle), ...], "pages": [page numbers linked], "has_next": bool}.
+    """
+    root = parse_document(html)
+    if root is None:
+        return {"items": [], "pages": [], "has_next": False}
+    return {"items": herbal_items(root), **pagination(root)}
+
+
+def parse_physical_listing(html: Union[str, bytes]) -> Dict:
+    """
+    Extract the product cards of a physical products listing page.
+    Returns {"items": [[name, price, handle], ...], "has_next": bool},
+    like scrap_equipement.parse_physical_page.
+    """
+    root = parse_document(html)
+    if root is None:
+        return {"items": [], "has_next": False}
+
+    items = []
+    for product in PHYSICAL_CARDS(root):
+        name_tag = PHYSICAL_TITLE(product)
+        price_tag = FIRST_SPAN(product)
+
+        product_name = text_of(name_tag[0]) if name_tag else "Unknown"
+        product_price = text_of(price_tag[0]) if price_tag else "ToBeDefined"
+
+        href = CARD_LINK(product)
+        items.append([product_name, product_price, product_handle(href[0]) if href else None])
+
+    return {"items": items, "has_next": bool(NEXT_PAGE(root))}
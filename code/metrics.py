@@ -0,0 +1,261 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Métriques d'exécution du pipeline : compteurs, jauges et
+    histogrammes en mémoire (latence des requêtes, octets téléchargés,
+    temps de parsing par page, tentatives, enregistrements par
+    catégorie, durée et pic de mémoire RSS de chaque étape).
+    Les événements sont écrits en JSON (une ligne par événement) et
+    l'état final peut être exporté au format texte de Prometheus
+    (fichier lu par le textfile collector de node_exporter).
+-------------------------------------------------
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+# ======================
+# CONFIG
+# ======================
+METRICS_DIR = Path(__file__).resolve().parent.parent / "data" / "metrics"
+PREFIX = "calebasse_"
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PARSE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+HELP: Dict[str, str] = {
+    'http_request_duration_seconds': "HTTP request latency, per attempt",
+    'http_response_bytes_total': "Bytes downloaded (response bodies)",
+    'http_retries_total': "Retried HTTP requests",
+    'page_cache_total': "Listing pages by page cache outcome",
+    'host_request_rate': "Adaptive request rate allowed per host (requests/s)",
+    'page_parse_seconds': "Parse time of one listing page",
+    'pages_total': "Listing pages crawled",
+    'crawl_pages_per_second': "Pages per second of the last crawl",
+    'records_total': "Records scraped per category",
+    'rows_written_total': "Rows written per output table",
+    'stage_duration_seconds': "Wall time of the last run of a pipeline stage",
+    'stage_peak_rss_bytes': "Peak resident memory during a pipeline stage",
+    'stage_success': "1 when the last run of a stage succeeded",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def label_key(labels: Dict) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in
+             ((name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+              for name, value in labels)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def format_value(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+# ======================
+# REGISTRY
+# ======================
+class Metrics:
+    """
+    Thread-safe metrics registry of the process.
+    log(event, **fields) appends a JSON line to the log file when one is set
+    (open_log, or the CALEBASSE_METRICS_LOG environment variable).
+    """
+
+    def __init__(self, log_path=None):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.gauges: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], list] = {}   # [comptes par borne, somme, nombre]
+        self.buckets: Dict[str, Sequence[float]] = {}
+        self._log = None
+        if log_path:
+            self.open_log(log_path)
+
+    # --- mesures ---
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self.gauges[(name, label_key(labels))] = value
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = LATENCY_BUCKETS,
+                **labels) -> None:
+        key = (name, label_key(labels))
+        with self._lock:
+            bounds = self.buckets.setdefault(name, tuple(buckets))
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * len(bounds), 0.0, 0]
+            for i, bound in enumerate(bounds):
+                if value <= bound:
+                    histogram[0][i] += 1
+                    break
+            histogram[1] += value
+            histogram[2] += 1
+
+    def total(self, name: str, **labels) -> float:
+        """Sum of a counter over the label sets that contain labels."""
+        wanted = set(label_key(labels))
+        with self._lock:
+            return sum(value for (counter, key), value in self.counters.items()
+                       if counter == name and wanted <= set(key))
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    # --- journal JSON ---
+    def open_log(self, path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+            self._log = open(path, "a", encoding="utf-8", buffering=1)
+
+    def close_log(self) -> None:
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def log(self, event: str, **fields) -> None:
+        if self._log is None:
+            return
+        line = json.dumps({"time": datetime.now().isoformat(timespec="milliseconds"),
+                           "event": event, "pid": os.getpid(), **fields},
+                          ensure_ascii=False, default=str)
+        with self._lock:
+            if self._log is not None:
+                self._log.write(line + "\n")
+
+    # --- export ---
+    def prometheus(self) -> str:
+        """State of the registry in the Prometheus text format."""
+        with self._lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            histograms = {key: (list(counts), total, count)
+                          for key, (counts, total, count) in self.histograms.items()}
+
+        lines = []
+        for kind, series in (("counter", counters), ("gauge", gauges), ("histogram", histograms)):
+            for name in sorted({name for name, _ in series}):
+                metric = PREFIX + name
+                if name in HELP:
+                    lines.append(f"# HELP {metric} {HELP[name]}")
+                lines.append(f"# TYPE {metric} {kind}")
+                for (series_name, labels), value in sorted(series.items()):
+                    if series_name != name:
+                        continue
+                    if kind != "histogram":
+                        lines.append(f"{metric}{format_labels(labels)} {format_value(value)}")
+                        continue
+                    counts, total, count = value
+                    cumulative = 0
+                    for bound, bucket_count in zip(self.buckets[name], counts):
+                        cumulative += bucket_count
+                        le = 'le="%g"' % bound
+                        lines.append(f"{metric}_bucket{format_labels(labels, le)} {cumulative}")
+                    le = 'le="+Inf"'
+                    lines.append(f"{metric}_bucket{format_labels(labels, le)} {count}")
+                    lines.append(f"{metric}_sum{format_labels(labels)} {format_value(total)}")
+                    lines.append(f"{metric}_count{format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path) -> Path:
+        """Write the Prometheus text file atomically (textfile collectors read it any time)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(self.prometheus(), encoding="utf-8")
+        os.replace(tmp_path, path)
+        return path
+
+
+METRICS = Metrics(os.environ.get("CALEBASSE_METRICS_LOG"))
+
+
+def table_written(path, rows: int, metrics: Metrics = METRICS) -> None:
+    """Count the rows of an output table (labelled by its file name)."""
+    table = Path(path).stem
+    metrics.inc("rows_written_total", rows, table=table)
+    metrics.log("table_written", table=table, rows=rows)
+
+
+# ======================
+# MEMORY
+# ======================
+def reset_peak_rss() -> None:
+    """Reset the kernel's peak RSS of the process (Linux), so the next read is per stage."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss() -> Optional[int]:
+    """Peak resident memory of the process in bytes (since the last reset on Linux)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss : kilo-octets sous Linux, octets sous macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# ======================
+# STAGES
+# ======================
+@contextmanager
+def stage(name: str, metrics: Metrics = METRICS):
+    """Time a pipeline stage and record its wall time, peak RSS and status."""
+    reset_peak_rss()
+    metrics.log("stage_start", stage=name)
+    start = time.perf_counter()
+    status = "failed"
+    try:
+        yield
+        status = "ok"
+    finally:
+        seconds = time.perf_counter() - start
+        peak = peak_rss()
+        metrics.set("stage_duration_seconds", seconds, stage=name)
+        metrics.set("stage_success", 1 if status == "ok" else 0, stage=name)
+        if peak is not None:
+            metrics.set("stage_peak_rss_bytes", peak, stage=name)
+        metrics.log("stage_end", stage=name, status=status, seconds=round(seconds, 3),
+                    peak_rss_bytes=peak)
@@ -0,0 +1,154 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Rapprochement approximatif des noms de produits (catégories de type
+    et catégories d'usage) : index inversé de trigrammes pour trouver
+    les candidats sans comparer toutes les paires, score de Dice sur
+    les trigrammes, et table de correspondances avec leur confiance.
+    "Ginseng root 100g" et "Ginseng Root – 100 g" sont ainsi reconnus
+    comme un seul produit.
+-------------------------------------------------
+"""
+
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Sequence, Set
+
+import pandas as pd
+
+# ======================
+# CONFIG
+# ======================
+MATCH_THRESHOLD = 0.85   # score de Dice minimal pour fusionner deux noms
+
+DECIMAL_SEPARATOR = re.compile(r"(?<=\d)[.,](?=\d)")
+# ponctuation, sauf le point décimal ("1.5 kg" n'est pas "15 kg")
+PUNCTUATION = re.compile(r"(?:(?!(?<=\d)\.(?=\d))[^\w])+")
+NUMBER_UNIT = re.compile(r"(?<=\d)(?=[^\W\d_])|(?<=[^\W\d_])(?=\d)")
+NUMBERS = re.compile(r"\d+(?:\.\d+)?")
+
+
+# ======================
+# NORMALIZATION
+# ======================
+def match_key(name) -> str:
+    """
+    Normalized form used for matching: no accents, lower case, dashes and
+    punctuation as spaces, numbers split from their unit ("100g" -> "100 g")
+    and decimal commas as points ("1,5 kg" -> "1.5 kg").
+    """
+    if name is None or (isinstance(name, float) and pd.isna(name)):
+        return ''
+    text = unicodedata.normalize('NFKD', str(name))
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    text = DECIMAL_SEPARATOR.sub('.', NUMBER_UNIT.sub(' ', text))
+    return ' '.join(PUNCTUATION.sub(' ', text).replace('_', ' ').split())
+
+
+def trigrams(key: str) -> FrozenSet[str]:
+    padded = f"  {key} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def numbers(key: str) -> FrozenSet[str]:
+    """Quantities of a name: "100 g" and "250 g" never match."""
+    return frozenset(NUMBERS.findall(key))
+
+
+# ======================
+# INDEX
+# ======================
+class NameIndex:
+    """
+    Trigram inverted index over a list of names.
+    Names are grouped by quantities ("100 g" never matches "250 g"), and
+    best_match(name) only scores the names of its group sharing one of
+    the rarest trigrams of the query (prefix filtering): a name sharing
+    none of them cannot reach the threshold, so no candidate is missed.
+    """
+
+    def __init__(self, names: Sequence):
+        self.names = list(names)
+        self.keys = [match_key(name) for name in self.names]
+        self.grams = [trigrams(key) for key in self.keys]
+        self.numbers = [numbers(key) for key in self.keys]
+
+        self.exact: Dict[str, int] = {}
+        # quantités -> trigramme -> noms
+        self.postings: Dict[FrozenSet[str], Dict[str, List[int]]] = defaultdict(dict)
+        for i, (key, grams) in enumerate(zip(self.keys, self.grams)):
+            self.exact.setdefault(key, i)
+            group = self.postings[self.numbers[i]]
+            for gram in grams:
+                if gram in group:
+                    group[gram].append(i)
+                else:
+                    group[gram] = [i]
+
+    def candidates(self, grams: FrozenSet[str], quantities: FrozenSet[str],
+                   threshold: float) -> Set[int]:
+        """Names with these quantities that may score at least threshold against grams."""
+        # Dice >= t exige au moins t * |A| / (2 - t) trigrammes communs :
+        # il suffit de chercher dans les |A| - needed + 1 plus rares
+        needed = max(1, math.ceil(threshold * len(grams) / (2 - threshold) - 1e-9))
+        group = self.postings.get(quantities, {})
+        postings = [group.get(gram, ()) for gram in grams]
+        found = set()
+        for ids in sorted(postings, key=len)[:len(grams) - needed + 1]:
+            found.update(ids)
+        return found
+
+    def best_match(self, name, threshold: float = MATCH_THRESHOLD):
+        """(index, score) of the closest name, or None below threshold."""
+        key = match_key(name)
+        if not key:
+            return None
+        if key in self.exact:
+            return self.exact[key], 1.0
+
+        grams = trigrams(key)
+        quantities = numbers(key)
+        best = None
+        for i in self.candidates(grams, quantities, threshold):
+            score = 2 * len(grams & self.grams[i]) / (len(grams) + len(self.grams[i]))
+            if score >= threshold and (best is None or score > best[1] or (score == best[1] and i < best[0])):
+                best = (i, score)
+        return best
+
+
+# ======================
+# MATCH TABLE
+# ======================
+def match_names(left: Iterable, right: Iterable,
+                threshold: float = MATCH_THRESHOLD) -> pd.DataFrame:
+    """
+    Match each right name to at most one left name (and vice versa).
+    Returns the match table: Left name, Right name, Score (1.0 = same
+    normalized name), best scores first; unmatched names are absent.
+    """
+    left = list(dict.fromkeys(left))
+    right = list(dict.fromkeys(right))
+    index = NameIndex(left)
+
+    proposals = []
+    for name in right:
+        match = index.best_match(name, threshold)
+        if match is not None:
+            proposals.append((match[1], name, left[match[0]]))
+
+    # attribution gloutonne : meilleurs scores d'abord, un nom par côté
+    used_left, used_right, rows = set(), set(), []
+    for score, right_name, left_name in sorted(proposals, key=lambda p: -p[0]):
+        if left_name in used_left or right_name in used_right:
+            continue
+        used_left.add(left_name)
+        used_right.add(right_name)
+        rows.append((left_name, right_name, round(score, 4)))
+
+    return pd.DataFrame(rows, columns=['Left name', 'Right name', 'Score'])
+
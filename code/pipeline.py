@@ -0,0 +1,249 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Exécution du pipeline sans Streamlit (cron, tâches planifiées) :
+    scrape -> process -> history (prix) -> aggregate -> export (PNG) -> report (HTML).
+    Chaque étape est chronométrée ; --stages choisit les étapes et le
+    code de sortie est non nul dès qu'une étape échoue.
+    Les métriques du run (requêtes, pages, enregistrements, durée et pic
+    de mémoire de chaque étape) sont journalisées en JSON dans
+    data/metrics/pipeline.jsonl et, avec --prometheus, exportées au
+    format texte de Prometheus.
+
+    python -m code.pipeline [--stages process,history,aggregate,export,report]
+-------------------------------------------------
+"""
+
+import argparse
+import html
+import os
+import sys
+import time
+import traceback
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from .metrics import METRICS, METRICS_DIR, stage
+
+# ======================
+# CONFIG
+# ======================
+STAGES = ['scrape', 'process', 'history', 'aggregate', 'export', 'report']
+REPORT_PATH = Path(__file__).resolve().parent.parent / "demo" / "report.html"
+
+EXIT_OK = 0
+EXIT_STAGE_FAILED = 1
+
+
+# ======================
+# STAGES
+# ======================
+def stage_scrape(args) -> None:
+    from concurrent.futures import ThreadPoolExecutor
+
+    from .crawler import MAX_CONCURRENCY, parse_pool
+    from .http_cache import PAGE_CACHE
+    from .scrap_equipement import main as scrap_equipement
+    from .scrap_herbal import scrap_all
+
+    PAGE_CACHE.max_age = args.max_age
+    # les deux crawls tournent en même temps : un rafraîchissement complet
+    # dure autant que le plus lent, et ils se partagent la limite de
+    # concurrence et le pool de parsing, démarré une fois pour les deux
+    parse_pool()
+    options = dict(max_workers=max(1, MAX_CONCURRENCY // 2), incremental=args.incremental,
+                   resume=args.resume, base_url=args.base_url)
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="scrape") as pool:
+        crawls = [pool.submit(scrap_equipement, **options), pool.submit(scrap_all, **options)]
+    for crawl in crawls:
+        crawl.result()
+
+
+def stage_process(args) -> None:
+    from .process_equipement import main as process_equipement
+    from .process_herbal import main as process_herbal
+
+    process_equipement(incremental=args.incremental)
+    process_herbal(incremental=args.incremental)
+
+
+def stage_history(args) -> None:
+    from .price_history import main as record_history
+
+    record_history()
+
+
+def stage_aggregate(args) -> None:
+    from .aggregates import main as aggregate
+
+    aggregate(incremental=args.incremental)
+
+
+def stage_export(args) -> None:
+    from .chart_export import export_charts
+
+    status = export_charts(args.images_dir, workers=args.workers, force=args.force)
+    rendered = sum(state == "rendered" for state in status.values())
+    print(f"[EXPORT] {rendered} chart(s) rendered, {len(status) - rendered} unchanged")
+
+
+def stage_report(args) -> None:
+    write_report(args.report, args.images_dir, args.timings)
+    print(f"[REPORT] {args.report}")
+
+
+STAGE_FUNCTIONS: Dict[str, Callable] = {
+    'scrape': stage_scrape,
+    'process': stage_process,
+    'history': stage_history,
+    'aggregate': stage_aggregate,
+    'export': stage_export,
+    'report': stage_report,
+}
+
+
+# ======================
+# REPORT
+# ======================
+def stats_table(stats, key: str) -> str:
+    """HTML table of aggregate rows (one per category)."""
+    columns = ['count', 'mean', 'median', 'q1', 'q3', 'min', 'max']
+    table = stats[columns].round(2).rename_axis(key).reset_index()
+    return table.to_html(index=False, na_rep="", border=0, classes="stats")
+
+
+def write_report(path, images_dir, timings: List[Tuple[str, float, str]]) -> None:
+    """Static HTML report: stage timings, charts and per-category statistics."""
+    from .aggregates import AGGREGATES_CSV, ensure_aggregates, select
+    from .chart_export import CHARTS
+    from .storage import read_table
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    ensure_aggregates()
+    aggregates = read_table(AGGREGATES_CSV)
+
+    rows = "".join(
+        f"<tr><td>{html.escape(name)}</td><td>{seconds:.2f} s</td><td>{status}</td></tr>"
+        for name, seconds, status in timings
+    )
+    images = "".join(
+        f'<figure><img src="{html.escape(os.path.relpath(Path(images_dir) / f"{chart.name}.png", path.parent))}"'
+        f' alt="{chart.name}"><figcaption>{chart.name}</figcaption></figure>'
+        for chart in CHARTS
+    )
+    tables = "".join(
+        f"<h3>{html.escape(title)}</h3>{stats_table(select(aggregates, dataset, key), key)}"
+        for title, dataset, key in [
+            ("Equipment — per category", 'equipment', 'Product category'),
+            ("Herbal — per product category", 'herbal', 'Product category'),
+            ("Herbal — per use category", 'herbal', 'Use category'),
+        ]
+    )
+
+    page = f"""<!DOCTYPE html>
+<html lang="fr"><head><meta charset="utf-8">
+<title>Calebasse — Product Data Report</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+figure {{ display: inline-block; margin: 1em; }}
+img {{ max-width: 640px; }}
+table {{ border-collapse: collapse; margin-bottom: 1.5em; }}
+td, th {{ padding: 0.2em 0.8em; border-bottom: 1px solid #ddd; text-align: right; }}
+</style></head><body>
+<h1>Calebasse — Product Data Report</h1>
+<p>Generated {datetime.now():%Y-%m-%d %H:%M}</p>
+<h2>Stages</h2><table><tr><th>Stage</th><th>Time</th><th>Status</th></tr>{rows}</table>
+<h2>Charts</h2>{images}
+<h2>Statistics</h2>{tables}
+</body></html>
+"""
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(page, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+# ======================
+# RUNNER
+# ======================
+def run(stages: List[str], args) -> int:
+    """Run stages in pipeline order; stop at the first failure."""
+    args.timings = []
+    METRICS.log("run_start", stages=stages)
+    try:
+        for name in [name for name in STAGES if name in stages]:
+            print(f"[STAGE] {name} ...")
+            start = time.perf_counter()
+            try:
+                with stage(name):
+                    STAGE_FUNCTIONS[name](args)
+            except Exception:
+                traceback.print_exc()
+                args.timings.append((name, time.perf_counter() - start, "failed"))
+                print(f"[STAGE] {name}: failed after {args.timings[-1][1]:.2f} s", file=sys.stderr)
+                return EXIT_STAGE_FAILED
+            args.timings.append((name, time.perf_counter() - start, "ok"))
+            print(f"[STAGE] {name}: {args.timings[-1][1]:.2f} s")
+
+        total = sum(seconds for _, seconds, _ in args.timings)
+        print(f"[DONE] {len(args.timings)} stage(s) in {total:.2f} s")
+        return EXIT_OK
+    finally:
+        METRICS.log("run_end", status="ok" if all(s == "ok" for _, _, s in args.timings) else "failed",
+                    seconds=round(sum(seconds for _, seconds, _ in args.timings), 3),
+                    pages=METRICS.total("pages_total", result="ok"),
+                    records=METRICS.total("records_total"),
+                    bytes_downloaded=METRICS.total("http_response_bytes_total"),
+                    retries=METRICS.total("http_retries_total"))
+        if getattr(args, "prometheus", None):
+            print(f"[METRICS] {METRICS.write_prometheus(args.prometheus)}")
+
+
+def parse_stages(value: str) -> List[str]:
+    stages = [stage.strip() for stage in value.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown stage(s): {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+    return stages
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the Calebasse pipeline without Streamlit")
+    parser.add_argument("--stages", type=parse_stages, default=STAGES,
+                        help=f"comma-separated stages to run (default: {','.join(STAGES)})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="reuse unchanged categories and skip unchanged stages")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip the pages completed by the last interrupted scrape")
+    parser.add_argument("--max-age", type=float, default=None,
+                        help="serve cached pages younger than MAX_AGE seconds without revalidation")
+    parser.add_argument("--base-url", default=None,
+                        help="site to scrape (default: CALEBASSE_BASE_URL or https://calebasse.com)")
+    parser.add_argument("--images-dir", default=str(REPORT_PATH.parent / "images"))
+    parser.add_argument("--report", default=str(REPORT_PATH))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="chart rendering processes")
+    parser.add_argument("--force", action="store_true", help="re-render unchanged charts")
+    parser.add_argument("--metrics-log", default=str(METRICS_DIR / "pipeline.jsonl"),
+                        help="JSON lines log of the run metrics ('' to disable)")
+    parser.add_argument("--prometheus", default=None, metavar="PATH",
+                        help="also write the metrics in the Prometheus text format "
+                             "(e.g. for the node_exporter textfile collector)")
+    args = parser.parse_args(argv)
+    if args.metrics_log:
+        METRICS.open_log(args.metrics_log)
+
+    # aucun affichage : rendu matplotlib hors écran
+    import matplotlib
+    matplotlib.use("Agg")
+
+    return run(args.stages, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Thème seaborn des graphiques, appliqué au premier graphique construit
+    plutôt qu'à l'import : les scripts de scraping et de traitement
+    n'importent ni seaborn ni matplotlib.
+-------------------------------------------------
+"""
+
+_applied = False
+
+
+def apply_theme() -> None:
+    """Set the dashboard's seaborn theme once per process."""
+    global _applied
+    if not _applied:
+        import seaborn as sns
+        sns.set_theme(style="whitegrid", palette="Set2")
+        _applied = True
@@ -0,0 +1,321 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Historique des prix (SQLite, en ajout seul). Chaque exécution du
+    pipeline enregistre les prix des tables finales à la date du jour ;
+    seuls les prix nouveaux ou modifiés ajoutent une ligne. Les requêtes
+    par période (changements de prix des 30 derniers jours par
+    catégorie) passent par l'index (dataset, date), sans parcourir
+    tout l'historique.
+
+    python -m code.price_history [--date AAAA-MM-JJ] [--changes 30]
+-------------------------------------------------
+"""
+
+import sqlite3
+from contextlib import closing
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+
+from .identity import product_key
+from .storage import read_table, table_exists
+
+# ======================
+# CONFIG
+# ======================
+HISTORY_PATH = Path(__file__).resolve().parent.parent / "data" / "price_history.sqlite"
+
+# tables enregistrées : dataset -> (table finale, séparateur des catégories)
+DATASETS: Dict[str, tuple] = {
+    'herbal': ('data/final_herb_products.csv', ';'),
+    'equipment': ('data/final_process_equipement.csv', ','),
+}
+# colonnes de catégories enregistrées (celles présentes dans la table)
+CATEGORY_COLUMNS = ['Product category', 'Use category']
+
+SCHEMA = """
+-- dernier état connu de chaque produit
+CREATE TABLE IF NOT EXISTS products (
+    dataset     TEXT NOT NULL,
+    product_key TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    price       REAL,
+    first_seen  TEXT NOT NULL,
+    last_seen   TEXT NOT NULL,
+    PRIMARY KEY (dataset, product_key)
+) WITHOUT ROWID;
+
+-- dimension : colonne de la catégorie (Product category / Use category)
+CREATE TABLE IF NOT EXISTS product_categories (
+    dataset     TEXT NOT NULL,
+    product_key TEXT NOT NULL,
+    dimension   TEXT NOT NULL,
+    category    TEXT NOT NULL,
+    PRIMARY KEY (dataset, product_key, dimension, category)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS product_categories_by_category
+    ON product_categories (dataset, dimension, category);
+
+-- une ligne par prix nouveau ou modifié (ajout seul)
+CREATE TABLE IF NOT EXISTS prices (
+    dataset        TEXT NOT NULL,
+    product_key    TEXT NOT NULL,
+    observed_on    TEXT NOT NULL,
+    price          REAL,
+    previous_price REAL,
+    PRIMARY KEY (dataset, product_key, observed_on)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS prices_by_date ON prices (dataset, observed_on);
+"""
+
+
+# ======================
+# CONNECTION
+# ======================
+def connect(path=HISTORY_PATH) -> sqlite3.Connection:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    migrate(connection)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def migrate(connection: sqlite3.Connection) -> None:
+    """Histories recorded before the dimension column: their categories are product categories."""
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(product_categories)")]
+    if not columns or 'dimension' in columns:
+        return
+    with connection:
+        connection.execute("DROP INDEX IF EXISTS product_categories_by_category")
+        connection.execute("ALTER TABLE product_categories RENAME TO product_categories_old")
+        connection.executescript(SCHEMA)
+        connection.execute(
+            "INSERT INTO product_categories SELECT dataset, product_key, 'Product category',"
+            " category FROM product_categories_old")
+        connection.execute("DROP TABLE product_categories_old")
+
+
+# ======================
+# WRITE
+# ======================
+def price_rows(df: pd.DataFrame, separator: str) -> pd.DataFrame:
+    """
+    (key, name, price, one list of categories per category column) of a
+    final table, one row per product key.
+    """
+    prices = pd.to_numeric(df['Price (€)'], errors='coerce')
+    # sans Product ID : le nom, complété de la catégorie pour les homonymes
+    # (jamais du prix : un changement de prix n'est pas un nouveau produit)
+    names = df['Product name'].astype(str)
+    fallback = names.where(~names.duplicated(keep=False),
+                           names + ' [' + df['Product category'].astype(str) + ']')
+    rows = pd.DataFrame({
+        'product_key': product_key(df, fallback).astype(str),
+        'name': names,
+        'price': prices.astype(object).where(prices.notna(), None),
+    })
+    for column in CATEGORY_COLUMNS:
+        if column in df:
+            rows[column] = df[column].astype(str).str.split(separator)
+    return rows.drop_duplicates('product_key')
+
+
+def record_prices(connection: sqlite3.Connection, dataset: str, df: pd.DataFrame,
+                  observed_on: Optional[str] = None, separator: str = ';') -> int:
+    """
+    Record the prices of a final table at observed_on (today by default).
+    Only new products and changed prices add a row to the history.
+    Returns the number of rows added.
+    """
+    observed_on = observed_on or date.today().isoformat()
+    rows = price_rows(df, separator)
+
+    with connection:
+        connection.execute("DROP TABLE IF EXISTS temp.snapshot")
+        connection.execute(
+            "CREATE TEMP TABLE snapshot (product_key TEXT PRIMARY KEY, name TEXT, price REAL)")
+        connection.executemany(
+            "INSERT INTO temp.snapshot VALUES (?, ?, ?)",
+            rows[['product_key', 'name', 'price']].itertuples(index=False, name=None))
+
+        # prix nouveaux ou modifiés (IS NOT : les prix manquants comptent)
+        before = connection.total_changes
+        connection.execute(
+            """
+            INSERT INTO prices (dataset, product_key, observed_on, price, previous_price)
+            SELECT ?, s.product_key, ?, s.price, p.price
+            FROM temp.snapshot s
+            LEFT JOIN products p ON p.dataset = ? AND p.product_key = s.product_key
+            WHERE p.product_key IS NULL OR p.price IS NOT s.price
+            ON CONFLICT (dataset, product_key, observed_on) DO UPDATE SET price = excluded.price
+            """,
+            (dataset, observed_on, dataset))
+        added = connection.total_changes - before
+
+        connection.execute(
+            """
+            INSERT INTO products (dataset, product_key, name, price, first_seen, last_seen)
+            SELECT ?, product_key, name, price, ?, ? FROM temp.snapshot WHERE true
+            ON CONFLICT (dataset, product_key) DO UPDATE SET
+                name = excluded.name, price = excluded.price, last_seen = excluded.last_seen
+            """,
+            (dataset, observed_on, observed_on))
+
+        connection.execute(
+            "DELETE FROM product_categories WHERE dataset = ?"
+            " AND product_key IN (SELECT product_key FROM temp.snapshot)", (dataset,))
+        for column in CATEGORY_COLUMNS:
+            if column not in rows:
+                continue
+            links = rows[['product_key', column]].explode(column)
+            links[column] = links[column].str.strip()
+            connection.executemany(
+                "INSERT OR IGNORE INTO product_categories VALUES (?, ?, ?, ?)",
+                ((dataset, key, column, category) for key, category in links.itertuples(index=False)
+                 if category))
+        connection.execute("DROP TABLE temp.snapshot")
+    return added
+
+
+# ======================
+# QUERIES
+# ======================
+def price_changes(connection: sqlite3.Connection, days: int = 30,
+                  dataset: Optional[str] = None, today: Optional[str] = None) -> pd.DataFrame:
+    """
+    Price changes of the last days per category of each category column
+    (new products excluded): number of changes, products changed and
+    mean change in %.
+    """
+    since = (date.fromisoformat(today) if today else date.today()) - timedelta(days=days)
+    datasets = [dataset] if dataset else list(DATASETS)
+    query = f"""
+        SELECT c.dataset, c.dimension, c.category,
+               COUNT(*) AS changes,
+               COUNT(DISTINCT p.product_key) AS products,
+               AVG((p.price - p.previous_price) * 100.0 / p.previous_price) AS mean_change_pct
+        FROM prices p
+        JOIN product_categories c ON c.dataset = p.dataset AND c.product_key = p.product_key
+        WHERE p.dataset IN ({', '.join('?' * len(datasets))}) AND p.observed_on >= ?
+          AND p.previous_price IS NOT NULL
+        GROUP BY c.dataset, c.dimension, c.category
+        ORDER BY changes DESC, c.dimension, c.category
+    """
+    return pd.read_sql_query(query, connection, params=[*datasets, since.isoformat()])
+
+
+def dimensions(connection: sqlite3.Connection, dataset: str) -> list:
+    """Category columns recorded for dataset."""
+    rows = connection.execute(
+        "SELECT DISTINCT dimension FROM product_categories WHERE dataset = ? ORDER BY dimension",
+        (dataset,))
+    return [dimension for (dimension,) in rows]
+
+
+def categories(connection: sqlite3.Connection, dataset: str,
+               dimension: str = 'Product category') -> list:
+    rows = connection.execute(
+        "SELECT DISTINCT category FROM product_categories"
+        " WHERE dataset = ? AND dimension = ? ORDER BY category",
+        (dataset, dimension))
+    return [category for (category,) in rows]
+
+
+def price_trend(connection: sqlite3.Connection, dataset: str,
+                category: Optional[str] = None,
+                dimension: str = 'Product category') -> pd.DataFrame:
+    """
+    Mean price per observation date of the products of a category of the
+    dimension column (all products without category): each product keeps
+    its last recorded price until it changes. Indexed by date.
+    """
+    if category:
+        query = """
+            SELECT p.observed_on, p.product_key, p.price FROM product_categories c
+            JOIN prices p ON p.dataset = c.dataset AND p.product_key = c.product_key
+            WHERE c.dataset = ? AND c.dimension = ? AND c.category = ?
+        """
+        params = (dataset, dimension, category)
+    else:
+        query = "SELECT observed_on, product_key, price FROM prices WHERE dataset = ?"
+        params = (dataset,)
+
+    history = pd.read_sql_query(query, connection, params=params)
+    if history.empty:
+        return pd.DataFrame(columns=['mean price', 'products'])
+    prices = (history.pivot_table(index='observed_on', columns='product_key',
+                                  values='price', aggfunc='last')
+              .sort_index().ffill())
+    prices.index = pd.to_datetime(prices.index)
+    return pd.DataFrame({'mean price': prices.mean(axis=1), 'products': prices.notna().sum(axis=1)})
+
+
+# ======================
+# STREAMLIT
+# ======================
+def show_price_trends(path=HISTORY_PATH, days: int = 30) -> None:
+    """Price trend view of the dashboard: mean price over time, recent changes."""
+    import streamlit as st
+
+    st.header("📈 Évolution des prix")
+    if not Path(path).exists():
+        st.info("Pas encore d'historique des prix : python -m code.pipeline --stages history")
+        return
+
+    with closing(connect(path)) as connection:
+        dataset = st.selectbox("Produits", list(DATASETS), key="history_dataset")
+        dimension = st.selectbox("Type de catégorie",
+                                 dimensions(connection, dataset) or ['Product category'],
+                                 key="history_dimension")
+        category = st.selectbox("Catégorie",
+                                ["(toutes)"] + categories(connection, dataset, dimension),
+                                key="history_category")
+        trend = price_trend(connection, dataset, None if category == "(toutes)" else category,
+                            dimension)
+        changes = price_changes(connection, days, dataset)
+
+    if trend.empty:
+        st.info("Aucun prix enregistré pour cette sélection")
+    else:
+        st.line_chart(trend['mean price'])
+    st.subheader(f"Changements de prix des {days} derniers jours, par catégorie")
+    st.dataframe(changes.drop(columns='dataset'), hide_index=True)
+
+
+# ======================
+# STAGE
+# ======================
+def main(observed_on: Optional[str] = None, path=HISTORY_PATH) -> Dict[str, int]:
+    """Record the prices of the final tables; returns the rows added per dataset."""
+    added = {}
+    with closing(connect(path)) as connection:
+        for dataset, (table, separator) in DATASETS.items():
+            if not table_exists(table):
+                continue
+            df = read_table(table, categorical=False)
+            added[dataset] = record_prices(connection, dataset, df, observed_on, separator)
+            print(f"[HISTORY] {dataset}: {added[dataset]} new price(s) recorded")
+    return added
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Record and query the price history")
+    parser.add_argument("--date", default=None, help="observation date (default: today)")
+    parser.add_argument("--changes", type=int, metavar="DAYS", default=None,
+                        help="print the price changes of the last DAYS days per category")
+    args = parser.parse_args()
+    if args.changes is None:
+        main(args.date)
+    else:
+        with closing(connect()) as connection:
+            print(price_changes(connection, args.changes, today=args.date).to_string(index=False))
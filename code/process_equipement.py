@@ -13,58 +13,80 @@ Description :
 
 import re
 import os
+import numpy as np
 import pandas as pd
 
-def combine_same_products(path_csv, output_path=None):
+from .identity import PRODUCT_ID, product_key
+from .incremental import has_changes
+from .metrics import table_written
+from .storage import read_table, table_exists, write_table
+
+def combine_products(df):
+    """
+    Combiner les lignes d'un même produit : un produit par Product ID
+    (par nom pour les lignes sans ID), dans l'ordre de première
+    apparition, avec le nom et le prix de sa première ligne et ses
+    catégories uniques jointes par ", " dans leur ordre d'apparition.
+    Vectorisé (drop_duplicates + groupby), sans boucle Python par ligne.
+    """
+    name, price, category = 'Product name', 'Price (€)', 'Product category'
+    df = df.assign(_key=product_key(df, df[name]))
+
+    # première ligne de chaque produit : ordre de sortie, nom et prix
+    first = df.drop_duplicates('_key')
+
+    # catégories uniques par produit ; groupes numérotés dans l'ordre
+    # d'apparition des produits, donc dans l'ordre de first
+    unique = df.drop_duplicates(['_key', category])
+    groups = unique.groupby('_key', sort=False, dropna=False)
+    product = groups.ngroup().to_numpy()
+    rank = groups.cumcount().to_numpy()
+    values = unique[category].to_numpy(dtype=object)
+
+    # jointure ", " rang par rang (au plus une passe par catégorie)
+    # plutôt qu'un appel Python par produit
+    categories = np.empty(len(first), dtype=object)
+    for position in range(rank.max() + 1 if len(rank) else 0):
+        selected = rank == position
+        rows = product[selected]
+        categories[rows] = (values[selected] if position == 0
+                            else categories[rows] + ', ' + values[selected])
+
+    combined = pd.DataFrame({
+        name: first[name].to_numpy(),
+        price: first[price].to_numpy(),
+        category: categories,
+    })
+    if PRODUCT_ID in df:
+        combined[PRODUCT_ID] = first[PRODUCT_ID].to_numpy()
+    return combined
+
+
+def combine_same_products(path_csv, output_path="data/final_process_equipement.csv"):
     """
     parcourir les données et combiner les produits 
     avec les mêmes catégories
     """
-    df = pd.read_csv(path_csv, encoding='utf-8-sig')
-    
-    # Grouper par nom de produit
-    products_by_name = {}
-    
-    for index, row in df.iterrows():
-        product_name = row['Product name']
-        category = row['Product category']
-        price = row['Price (€)']
-        
-        if product_name not in products_by_name:
-            # Créer une nouvelle entrée
-            products_by_name[product_name] = {
-                'Product category': [category],
-                'Price (€)': price
-            }
-        else:
-            # Ajouter la catégorie si elle n'existe pas déjà
-            if category not in products_by_name[product_name]['Product category']:
-                products_by_name[product_name]['Product category'].append(category)
-    
-    # Convertir en DataFrame
-    result_data = []
-    for product_name, info in products_by_name.items():
-        result_data.append({
-            'Product name': product_name,
-            'Price (€)': info['Price (€)'],
-            'Product category': ', '.join(info['Product category'])
-        })
-    
-    result_df = pd.DataFrame(result_data)
-    
-    # Sauvegarder
-  
-    output_path =  "data/final_process_equipement.csv"
-    
-    result_df.to_csv(output_path, index=False, encoding='utf-8-sig')
+    df = read_table(path_csv, categorical=False)
+    result_df = combine_products(df)
+
+    # Sauvegarder (table Arrow + export CSV)
+    store = write_table(result_df, output_path)
+    table_written(output_path, len(result_df))
     
-    print(f"✅ {len(result_data)} produits sauvegardés dans {output_path}")
+    print(f"✅ {len(result_df)} produits sauvegardés dans {store}")
     
     return result_df
 
 
-def main():
-    combine_same_products("data/raw_physical_products.csv")
+def main(incremental=False):
+    raw_csv = "data/raw_physical_products.csv"
+    output_csv = "data/final_process_equipement.csv"
+    # mode incrémental : rien à retraiter si le delta du scraping est vide
+    if incremental and table_exists(output_csv) and not has_changes(raw_csv):
+        print(f"Aucun changement depuis le dernier scraping, {output_csv} conservé")
+        return read_table(output_csv)
+    return combine_same_products(raw_csv, output_csv)
 
 
 if __name__ == '__main__':
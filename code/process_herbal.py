@@ -10,9 +10,15 @@ Description :
 -------------------------------------------------
 """
 
-import os
 import pandas as pd
 
+from .identity import PRODUCT_ID, product_ids, product_key
+from .metrics import table_written
+from .incremental import has_changes
+from .name_matching import MATCH_THRESHOLD, match_names
+from .product_filters import product_filter
+from .storage import read_table, table_exists, write_table
+
 
 def normalize_name(s):
     """Normalize product name for merging"""
@@ -28,61 +34,99 @@ def merge_categories(values):
     return '; '.join(sorted_values)
 
 
-def process_herbal_products(raw_herbal_csv: str, raw_uses_csv: str, output_csv: str):
-    """Process raw herbal and usage CSVs into final merged CSV"""
-    # --- Load CSVs ---
-    df_herbal = pd.read_csv(raw_herbal_csv)
-    df_herbal = df_herbal[~df_herbal["Product name"].str.contains("Filter|Boule à thé|filter")]
-
-    df_uses = pd.read_csv(raw_uses_csv)
-    df_uses = df_uses[~df_uses["Product name"].str.contains("sha|Roller|Plate|Massager|Brush|brush|Comb")]
-
-    # --- Normalize names for merging ---
-    df_herbal['name_norm'] = df_herbal['Product name'].apply(normalize_name)
-    df_uses['name_norm'] = df_uses['Product name'].apply(normalize_name)
+def process_herbal_products(raw_herbal_csv: str, raw_uses_csv: str, output_csv: str,
+                            matches_csv: str = None, threshold: float = MATCH_THRESHOLD):
+    """
+    Process raw herbal and usage tables into the final merged table.
+    Products are joined on their Product ID; rows without one (tables
+    scraped before the ID column) fall back to approximate name matching
+    (see name_matching), whose match table is saved to matches_csv.
+    """
+    # --- Load tables ---
+    # (règles d'exclusion : filter_rules.json)
+    df_herbal = product_filter("herbal_type").apply(read_table(raw_herbal_csv, categorical=False))
+    df_uses = product_filter("herbal_use").apply(read_table(raw_uses_csv, categorical=False))
+
+    # --- Product identity: Product ID (product URL handle) ---
+    df_herbal[PRODUCT_ID] = product_ids(df_herbal)
+    df_uses[PRODUCT_ID] = product_ids(df_uses)
+    herbal_named = df_herbal[df_herbal[PRODUCT_ID].isna()]
+    uses_named = df_uses[df_uses[PRODUCT_ID].isna()]
+
+    # --- Rows without ID (older snapshots): normalized names ---
+    herbal_norm = herbal_named['Product name'].apply(normalize_name)
+    uses_norm = uses_named['Product name'].apply(normalize_name)
+
+    # --- Fuzzy matching: usage names mapped onto the type names ---
+    # ("Ginseng Root – 100 g" rejoint "Ginseng root 100g")
+    matches = match_names(herbal_named['Product name'], uses_named['Product name'], threshold)
+    norm_of = dict(zip(herbal_named['Product name'], herbal_norm))
+    matched = dict(zip(matches['Right name'], matches['Left name'].map(norm_of)))
+    uses_norm = uses_named['Product name'].map(matched).fillna(uses_norm)
+    fuzzy = int((matches['Score'] < 1).sum())
+    print(f"Name matching: {len(matches)} matches ({fuzzy} fuzzy, threshold {threshold})")
+    if matches_csv:
+        write_table(matches, matches_csv, export_csv=True)
+
+    df_herbal['key'] = product_key(df_herbal, herbal_norm)
+    df_uses['key'] = product_key(df_uses, uses_norm)
 
     # --- Rename columns for clarity ---
     df_herbal = df_herbal.rename(columns={'Category': 'Product category'})
     df_uses = df_uses.rename(columns={'Category': 'Use category'})
 
-    # --- Merge ---
+    # --- Merge (hash join on the product key) ---
     df_merged = pd.merge(
-        df_herbal[['name_norm', 'Product name', 'Price (€)', 'Product category']],
-        df_uses[['name_norm', 'Product name', 'Price (€)', 'Use category']],
-        on='name_norm',
+        df_herbal[['key', 'Product name', 'Price (€)', 'Product category', PRODUCT_ID]],
+        df_uses[['key', 'Product name', 'Price (€)', 'Use category', PRODUCT_ID]],
+        on='key',
         how='outer',
         suffixes=('_type', '_use')
     )
 
-    df_merged['Product name'] = df_merged['Product name_type'].combine_first(df_merged['Product name_use'])
-    df_merged['Price (€)'] = df_merged['Price (€)_type'].combine_first(df_merged['Price (€)_use'])
+    for column in ['Product name', 'Price (€)', PRODUCT_ID]:
+        df_merged[column] = df_merged[f'{column}_type'].combine_first(df_merged[f'{column}_use'])
 
-    df_final = df_merged[['Product name', 'Price (€)', 'Product category', 'Use category']].copy()
+    df_final = df_merged[['Product name', 'Price (€)', 'Product category', 'Use category', PRODUCT_ID]].copy()
     df_final = df_final.fillna({'Product category': 'Others', 'Use category': 'Others'})
 
-    # --- Group by product name and price, merge categories ---
+    # --- One row per product (per name and price without ID), merge categories ---
+    df_final = df_final.dropna(subset=['Price (€)'])
+    by_name = df_final['Product name'] + '\x1f' + df_final['Price (€)'].astype(str)
     df_final = (
-        df_final.groupby(['Product name', 'Price (€)'])
+        df_final.groupby(product_key(df_final, by_name), sort=False)
         .agg({
+            'Product name': 'first',
+            'Price (€)': 'first',
             'Product category': merge_categories,
-            'Use category': merge_categories
+            'Use category': merge_categories,
+            PRODUCT_ID: 'first',
         })
-        .reset_index()
+        .sort_values(['Product name', 'Price (€)'], kind='stable')
+        .reset_index(drop=True)
     )
+    if df_final[PRODUCT_ID].isna().all():
+        df_final = df_final.drop(columns=PRODUCT_ID)
 
-    # --- Save CSV ---
-    os.makedirs(os.path.dirname(output_csv), exist_ok=True)
-    df_final.to_csv(output_csv, index=False, encoding='utf-8-sig')
+    # --- Save table (+ CSV export) ---
+    store = write_table(df_final, output_csv)
+    table_written(output_csv, len(df_final))
     print(f"✅ Total number of products: {len(df_final)}")
-    print(f"CSV saved at: {output_csv}")
+    print(f"Table saved at: {store}")
 
     return df_final
 
-def main():
+def main(incremental=False):
     raw_herbal_csv = "data/raw_herbal_products.csv"
     raw_uses_csv = "data/raw_uses_products.csv"
     output_csv = "data/final_herb_products.csv"
-    process_herbal_products(raw_herbal_csv, raw_uses_csv, output_csv)
+    matches_csv = "data/herbal_name_matches.csv"
+    # mode incrémental : rien à retraiter si les deltas du scraping sont vides
+    if (incremental and table_exists(output_csv)
+            and not has_changes(raw_herbal_csv) and not has_changes(raw_uses_csv)):
+        print(f"No change since last scraping, {output_csv} kept as is")
+        return read_table(output_csv)
+    return process_herbal_products(raw_herbal_csv, raw_uses_csv, output_csv, matches_csv)
     
 # --- Main entry ---
 if __name__ == "__main__":
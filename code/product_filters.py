@@ -0,0 +1,120 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Filtres de produits déclaratifs : les mots-clés à garder (include)
+    ou à exclure (exclude) par catégorie sont décrits dans
+    filter_rules.json. Les règles d'une table sont compilées en une
+    seule expression régulière, appliquée en une passe sur la colonne
+    des noms : ajouter une règle n'ajoute pas de passe sur les données.
+
+    Règles d'une catégorie (la catégorie "*" s'applique à toutes) :
+      include      un des mots-clés doit apparaître dans le nom
+      exclude      aucun des mots-clés ne doit apparaître
+      ignore_case  comparaison sans tenir compte de la casse (défaut : false)
+-------------------------------------------------
+"""
+
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import pandas as pd
+
+# ======================
+# CONFIG
+# ======================
+RULES_PATH = Path(__file__).resolve().parent / "filter_rules.json"
+ALL = "*"
+SEPARATOR = "\x1f"   # entre la catégorie et le nom dans le texte filtré
+
+
+# ======================
+# COMPILATION
+# ======================
+def keywords_pattern(rules: Iterable[Dict], key: str) -> str:
+    """Alternation of the key ("include" / "exclude") keywords of rules, "" if none."""
+    groups = []
+    for rule in rules:
+        words = sorted(set(rule.get(key, [])), key=len, reverse=True)
+        if words:
+            flags = "?i:" if rule.get("ignore_case") else "?:"
+            groups.append(f"({flags}{'|'.join(re.escape(word) for word in words)})")
+    return "|".join(groups)
+
+
+def conditions(rules: List[Dict]) -> str:
+    """
+    Lookaheads checking a name against rules, from the start of the name.
+    [\\s\\S]* rather than (?s).* : a global flag on the pattern would stop
+    pandas' str.match from accepting the compiled pattern.
+    """
+    include = keywords_pattern(rules, "include")
+    exclude = keywords_pattern(rules, "exclude")
+    return ((rf"(?=[\s\S]*(?:{include}))" if include else "")
+            + (rf"(?![\s\S]*(?:{exclude}))" if exclude else ""))
+
+
+def compile_rules(rules: Dict[str, Dict]) -> "re.Pattern":
+    """
+    One regex over "<category>\\x1f<name>" matching the names to keep:
+    one branch per category with its own rules (plus the "*" rules),
+    and a last branch for the other categories ("*" rules only).
+    """
+    common = [rules[ALL]] if ALL in rules else []
+    named = [category for category in rules if category != ALL]
+
+    branches = [f"{re.escape(category)}{SEPARATOR}{conditions([rules[category]] + common)}"
+                for category in named]
+    others = f"(?!(?:{'|'.join(re.escape(category) for category in named)}){SEPARATOR})" if named else ""
+    branches.append(f"{others}[^{SEPARATOR}]*{SEPARATOR}{conditions(common)}")
+    return re.compile(f"(?:{'|'.join(branches)})")
+
+
+# ======================
+# FILTER
+# ======================
+class ProductFilter:
+    """Compiled rules of one table (a section of filter_rules.json)."""
+
+    def __init__(self, section: Dict):
+        self.name_column = section.get("name_column", "Product name")
+        self.category_column = section.get("category_column", "Category")
+        self.pattern = compile_rules(section.get("rules", {}))
+
+    def keep(self, name, category="") -> bool:
+        return self.pattern.match(f"{category}{SEPARATOR}{name}") is not None
+
+    def mask(self, df: pd.DataFrame) -> pd.Series:
+        """Boolean mask of the rows to keep, one regex pass over the table."""
+        if self.category_column in df:
+            categories = df[self.category_column].astype(object).fillna("").astype(str)
+        else:
+            categories = pd.Series("", index=df.index, dtype=object)
+        names = df[self.name_column].astype(object).fillna("").astype(str)
+        text = (categories + SEPARATOR + names).astype(object)
+        return text.str.match(self.pattern).astype(bool)
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df[self.mask(df)]
+
+    def records(self, records: Iterable[Dict]) -> List[Dict]:
+        """Records (dicts) to keep, for the scrapers' streamed categories."""
+        return [record for record in records
+                if self.keep(record.get(self.name_column, ""),
+                             record.get(self.category_column, ""))]
+
+
+def load_rules(path=RULES_PATH) -> Dict[str, Dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def product_filter(table: str, path=RULES_PATH) -> ProductFilter:
+    """Compiled filter of a table of filter_rules.json ("physical", "herbal_type"...)."""
+    return ProductFilter(load_rules(path).get(table, {}))
@@ -5,18 +5,28 @@ Author  : Xinyi DU
 Date    : 2025-10-13
 Description :
     Scrape physical healthcare products from Calebasse Laboratoire
-    and save cleaned data into CSV and JSON.
+    and save cleaned data into CSV and NDJSON.
 -------------------------------------------------
 """
 
 from pathlib import Path
 import requests
+import os
 import re
-import time
 import csv
-import json
 from bs4 import BeautifulSoup
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
+
+from .crawler import fetch_and_parse, site_url, MAX_CONCURRENCY, PARSE_WORKERS, RATE_LIMITER
+from .metrics import METRICS
+from .http_cache import PAGE_CACHE
+from .listing_parser import parse_physical_listing
+from .sinks import OrderedBatches, RecordSink
+from .incremental import ChangeTracker, fingerprint, page_digest, read_snapshot, write_delta
+from .checkpoint import CrawlJournal
+from .storage import convert_csv
+from .identity import PRODUCT_ID, identity_keys, product_handle
+from .product_filters import product_filter
 
 # ======================
 # PATH CONFIG
@@ -25,18 +35,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
-# ======================
-# REQUEST SESSION
-# ======================
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-        "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15"
-    )
-}
-
-SESSION = requests.Session()
-SESSION.headers.update(HEADERS)
+# nom du parsing mis en cache par le PAGE_CACHE (v2 : items avec handle)
+PARSER = "physical-listing-v2"
 
 # ======================
 # UTILS
@@ -50,296 +50,377 @@ def has_next_page(soup: BeautifulSoup) -> bool:
     return any(soup.select_one(sel) for sel in selectors)
 
 
+def clean_price(price: str) -> str:
+    """
+    "38,90 €" -> "38.90". Prices that are already clean (rows reused
+    from the previous snapshot) and "ToBeDefined" are kept as is.
+    """
+    if price == "ToBeDefined" or re.fullmatch(r"\d+(\.\d+)?", price or ""):
+        return price
+    return re.sub(r"[^\d,]", "", price).replace(",", ".")
+
+
+# ======================
+# PARSER
+# ======================
+def parse_physical_page(html: str) -> Dict:
+    """
+    Extract the product cards of a listing page.
+    Returns {"items": [[name, price, handle], ...], "has_next": bool},
+    a JSON-friendly shape so the page cache can store it; handle is the
+    product URL handle (stable product ID), None without a link.
+    Reference implementation: the crawl uses the faster, identical
+    listing_parser.parse_physical_listing.
+    """
+    soup = BeautifulSoup(html, "lxml")
+
+    # only the card containers: "^product-card" alone would also
+    # match the title and price divs nested inside each card
+    products = soup.find_all(
+        "div", class_=re.compile("^product-card @container")
+    )
+
+    items = []
+    for product in products:
+        name_tag = product.find("div", class_=re.compile("product-card-title"))
+        price_tag = product.find("span")
+
+        product_name = (
+            name_tag.get_text(strip=True)
+            if name_tag else "Unknown"
+        )
+
+        product_price = (
+            price_tag.get_text(strip=True)
+            if price_tag else "ToBeDefined"
+        )
+
+        link = product.find("a", href=True)
+        items.append([product_name, product_price,
+                      product_handle(link["href"]) if link is not None else None])
+
+    return {"items": items, "has_next": has_next_page(soup)}
+
+
 # ======================
 # SCRAPER
 # ======================
-def scrape_physical_products(url: str, category: str) -> List[Dict]:
+def listing_url(url: str, page: int) -> str:
+    return url if page == 1 else f"{url}?page={page}"
+
+
+def fetch_listing(url: str, category: str, page: int):
+    """Fetch one listing page through the page cache, None on failure."""
+    page_url = listing_url(url, page)
+    print(f"[INFO] Fetching page {page}: {page_url}")
+    try:
+        return PAGE_CACHE.get(page_url, parser=PARSER)
+    except requests.RequestException as e:
+        print(f"[ERROR] Request failed: {e}")
+        return None
+
+
+def listing_result(unit, cached_page, parsed: Dict) -> Dict:
+    """
+    Cache a freshly parsed page, then keep only what the category needs:
+    the items, the pagination flag and the page digest (not the body).
+    """
+    if cached_page.parsed is None:
+        PAGE_CACHE.store_parsed(cached_page.url, parsed, parser=PARSER)
+    return {
+        "items": parsed["items"],
+        "has_next": parsed["has_next"],
+        "digest": cached_page.digest or page_digest(cached_page.content),
+    }
+
+
+def next_listing(unit, parsed: Dict) -> List:
+    """fetch_and_parse hook: follow the pagination of a category."""
+    url, category, page = unit
+    if parsed["items"] and parsed["has_next"]:
+        return [(url, category, page + 1)]
+    return []
+
+
+def category_products(url: str, category: str, pages: List[Dict], complete: bool,
+                      tracker: Optional[ChangeTracker] = None,
+                      previous: Optional[List[Dict]] = None) -> List[Dict]:
+    """
+    Build the records of a category from its listing_result pages.
+    In incremental mode (tracker given), an unchanged category returns
+    its rows from the previous snapshot instead.
+    """
+    results = [
+        {
+            "Product name": product_name,
+            "Price (€)": product_price,
+            "Product category": category,
+            PRODUCT_ID: handle,
+        }
+        for page in pages
+        for product_name, product_price, handle in page["items"]
+    ]
+
+    if tracker is not None and complete:
+        digest = fingerprint(page["digest"] for page in pages)
+        previous_rows = [
+            dict(item) for item in previous or []
+            if item["Product category"] == category
+        ]
+        if tracker.is_unchanged(url, digest) and previous_rows:
+            print(f"[INFO] Unchanged category: {category}")
+            record_category(category, len(previous_rows), len(pages), unchanged=True)
+            return previous_rows
+        tracker.update(url, digest)
+
+    print(f"[SUCCESS] {len(results)} products collected for {category}")
+    record_category(category, len(results), len(pages))
+    return results
+
+
+def record_category(category: str, records: int, pages: int, unchanged: bool = False) -> None:
+    METRICS.inc("records_total", records, dataset="physical", category=category)
+    METRICS.log("category", dataset="physical", category=category, records=records,
+                pages=pages, unchanged=unchanged)
+
+
+def scrape_physical_products(url: str, category: str,
+                             tracker: Optional[ChangeTracker] = None,
+                             previous: Optional[List[Dict]] = None) -> List[Dict]:
+    """
+    Scrape every listing page of a category, one page after the other.
+    """
     print(f"[INFO] Scraping category: {category}")
-    results = []
+    pages = []
+    complete = True
     page = 1
 
     while True:
-        page_url = url if page == 1 else f"{url}?page={page}"
-        print(f"[INFO] Fetching page {page}: {page_url}")
-
-        try:
-            response = SESSION.get(page_url, timeout=10)
-            response.raise_for_status()
-        except requests.RequestException as e:
-            print(f"[ERROR] Request failed: {e}")
+        cached_page = fetch_listing(url, category, page)
+        if cached_page is None:
+            complete = False
             break
 
-        soup = BeautifulSoup(response.text, "lxml")
+        # page inchangée (304) : on réutilise le parsing en cache
+        parsed = cached_page.parsed
+        if parsed is None:
+            parsed = parse_physical_listing(cached_page.text)
+        result = listing_result(None, cached_page, parsed)
+        pages.append(result)
 
-        products = soup.find_all(
-            "div", class_=re.compile("^product-card")
-        )
-
-        if not products:
+        if not result["items"]:
             print("[INFO] No products found, stopping.")
             break
 
-        for product in products:
-            name_tag = product.find("div", class_=re.compile("product-card-title"))
-            price_tag = product.find("span")
+        if not result["has_next"]:
+            break
 
-            product_name = (
-                name_tag.get_text(strip=True)
-                if name_tag else "Unknown"
-            )
+        page += 1
 
-            product_price = (
-                price_tag.get_text(strip=True)
-                if price_tag else "ToBeDefined"
-            )
+    return category_products(url, category, pages, complete, tracker, previous)
 
-            results.append({
-                "Product name": product_name,
-                "Price (€)": product_price,
-                "Product category": category
-            })
 
-        if not has_next_page(soup):
-            break
+def crawl_physical_categories(categories: List, emit: Callable[[int, List[Dict]], None],
+                              max_workers: int = MAX_CONCURRENCY,
+                              tracker: Optional[ChangeTracker] = None,
+                              previous: Optional[List[Dict]] = None,
+                              parse_workers: int = PARSE_WORKERS,
+                              journal: Optional[CrawlJournal] = None) -> None:
+    """
+    Scrape several (url, category) pairs at once: pages are fetched by
+    the I/O workers and parsed in a process pool, each parsed page
+    scheduling the fetch of the next one.
+    emit(index, records) receives the records of each category as soon
+    as it is complete, in the input order.
+    With a journal, completed pages are recorded and the pages already
+    done by an interrupted run are replayed without request.
+    """
+    index_of = {url: index for index, (url, _) in enumerate(categories)}
+    complete = [True] * len(categories)
+
+    def release(index, pages):
+        url, category = categories[index]
+        emit(index, category_products(url, category, pages, complete[index], tracker, previous))
+
+    batches = OrderedBatches(len(categories), release)
+
+    def fetch(url, category, page):
+        if journal is not None:
+            replayed = journal.replay(listing_url(url, page))
+            if replayed is not None:
+                return replayed
+        cached_page = fetch_listing(url, category, page)
+        if cached_page is None:
+            complete[index_of[url]] = False
+        return cached_page
+
+    def on_page(unit, cached_page, parsed):
+        url, _, page = unit
+        result = listing_result(unit, cached_page, parsed)
+        if journal is not None and cached_page.digest is None:
+            journal.record(cached_page.url, parsed, result["digest"])
+        batches.add(index_of[url], page, result)
+
+    for _, category in categories:
+        print(f"[INFO] Scraping category: {category}")
+
+    fetch_and_parse(
+        [(url, category, 1) for url, category in categories],
+        fetch, parse_physical_listing,
+        on_result=on_page, next_units=next_listing,
+        on_group_done=lambda url: batches.close(index_of[url]),
+        max_workers=max_workers, parse_workers=parse_workers, name="physical",
+    )
 
-        page += 1
-        time.sleep(1)
 
-    print(f"[SUCCESS] {len(results)} products collected for {category}")
-    return results
+def scrape_physical_categories(categories: List, max_workers: int = MAX_CONCURRENCY,
+                               tracker: Optional[ChangeTracker] = None,
+                               previous: Optional[List[Dict]] = None,
+                               parse_workers: int = PARSE_WORKERS) -> List[List[Dict]]:
+    """
+    Scrape several (url, category) pairs, see crawl_physical_categories.
+    Returns one list of records per category, in the input order.
+    """
+    all_products = [[] for _ in categories]
+
+    def collect(index, records):
+        all_products[index] = records
+
+    crawl_physical_categories(categories, collect, max_workers, tracker, previous, parse_workers)
+    return all_products
 
 
 # ======================
 # FILTER
 # ======================
 def filter_skin_products(data: List[Dict]) -> List[Dict]:
-    keywords = ['stone', 'plate', 'roller', 'tool', 'wood', 'pen', 'sha']
-    return [
-        item for item in data
-        if any(k in item["Product name"].lower() for k in keywords)
-    ]
+    """Skin products kept by the "skin" rules of filter_rules.json."""
+    skin_rules = product_filter("physical")
+    return [item for item in data if skin_rules.keep(item["Product name"], "skin")]
 
 
 # ======================
 # SAVE
 # ======================
-def save_products(data: List[List[Dict]]) -> None:
-    flat_data = []
-
-    for category_data in data:
-        for item in category_data:
-            price = item.get("Price (€)", "")
-            if price != "ToBeDefined":
-                price = re.sub(r"[^\d,]", "", price).replace(",", ".")
-            item["Price (€)"] = price
-            flat_data.append(item)
-
-    csv_path = DATA_DIR / "raw_physical_products.csv"
-    json_path = DATA_DIR / "raw_physical_products.json"
-
-    with open(csv_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=flat_data[0].keys())
-        writer.writeheader()
-        writer.writerows(flat_data)
-
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(flat_data, f, ensure_ascii=False, indent=2)
-
-    print(f"[SAVED] CSV → {csv_path}")
-    print(f"[SAVED] JSON → {json_path}")
-"""
--------------------------------------------------
-Project : Product Data Analysis -- Calebasse Laboratoire
-Author  : Xinyi DU
-Date    : 2025-10-13
-Description :
-    Ce script scrappe les produits d'équipement qui sert aux soins 
-    du corps sur le site Calebasse Laboratoire et sauvegarede les 
-    informations nettoyéescdes produits (nom du produit, prix, cathégorie)
-    au forma jons et csv
--------------------------------------------------
-"""
+FIELDNAMES = ["Product name", "Price (€)", "Product category", PRODUCT_ID]
+CSV_PATH = DATA_DIR / "raw_physical_products.csv"
+NDJSON_PATH = DATA_DIR / "raw_physical_products.ndjson"
 
-import webbrowser
-import requests
-import os
-import re
-from bs4 import BeautifulSoup
-import time
-import csv 
-import json
-import pandas as pd
 
+def clean_products(items: List[Dict]) -> List[Dict]:
+    for item in items:
+        item["Price (€)"] = clean_price(item.get("Price (€)", ""))
+    return items
 
 
+def save_products(data: List[List[Dict]], csv_file=CSV_PATH, ndjson_file=NDJSON_PATH) -> None:
+    """Clean the prices and write all categories to CSV and NDJSON."""
+    with RecordSink(csv_file, FIELDNAMES, ndjson_file) as sink:
+        for category_data in data:
+            sink.write(clean_products(category_data))
 
-def check_next_page(soup):
-    """
-    check if it has the next page
-    """
-    next_button_selectors = [
-        'a.next',
-        'a[rel="next"]',
-        'a.pagination-next',
-        'button.next-page',
-        'a:contains("Next")',
-        'a:contains',
-        'a.page-link:contains("›")',
-        'li.next a'
-    ]
-    
-    for selector in next_button_selectors:
-        if 'contains' in selector:
-            continue
-        next_btn = soup.select_one(selector)
-        if next_btn and not next_btn.get('disabled'):
-            return True        
+    print(f"[SAVED] CSV → {csv_file}")
+    print(f"[SAVED] NDJSON → {ndjson_file}")
 
-    
+
+# ======================
+# COMPATIBILITY
+# ======================
 def scrap_physical_products(url, categorie):
     """
     scrap healthcare physical products in website Calebasse Laboratoire
+    (ancien nom, conservé pour compatibilité : passe désormais par
+    scrape_physical_products et la couche HTTP partagée)
     """
+    return scrape_physical_products(url, categorie)
 
-    # stabiizer le site de web scrapping
-    headers = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15"}
-    print("********* loading physical healthy products *********")
 
-    # container pour collecer les données
-    product_date = []
-    # page initiale
-    current_page = 1
-    all_products = 0
-    
-    while True:
-        print(f'\n scrapping the {current_page} page')
-        
-        # consider la situation ou il y a plusieurs pages de produits
-        if current_page == 1:
-            page_url = url
-        else:
-            page_url = url + f'?page={current_page}'
-            
-        # se preparer pour le web scrapping
-        response = requests.get(page_url, headers=headers, timeout=10)
-        response.raise_for_status()
-        response.encoding = 'utf-8'
-        soup = BeautifulSoup(response.text, 'lxml')
-        
-        # trouver d'abord tous les produits 
-        class_partern_products = re.compile("^product-card @container")
-        physical_items = soup.find_all('div', attrs={"class":class_partern_products})
-        print(f"****** the {current_page} page has {len(physical_items)} products")
-        all_products += len(physical_items)
-        if not physical_items:
-            print(f'the {current_page} page does not have products, it is the last page')
-            print(f'in total we find ')
-            break
-        
-        # collecter ensuite les informations des produits
-        for i, product in enumerate(physical_items):
-            class_partern_name = re.compile("^product-card-title")
-            div_name = product.find('div', attrs={"class":class_partern_name})
-            product_name = div_name.get_text(strip=True)
-
-            div_price = product.find('span', attrs={"class":""})
-            if div_price:
-                product_price = div_price.get_text(strip=True)
-            else:
-                product_price == 'ToBeDefined'
-
-            product_date.append({
-                'Product name': product_name,
-                'Price (€)': product_price,
-                'Product category': categorie
-            })
-            
-        has_next_page = check_next_page(soup)
-        if not has_next_page:
-            print(f'already at the {current_page} page')
-            break
-        
-        current_page += 1
-        time.sleep(1)
-            
-    print(f'******* sucessfully grab{len(product_date)} physical products*******')
-    return product_date
-  
-     
 def skin_products_filter(data:list):
-    # tirer les mots-clés des produits d'équopement pour la peau
-    keywords = ['stone', 'plate', 'roller', 'tool', 'wood', 'pen', 'sha']
-    data = [
-        item for item in data
-        if any(kw in item.get('Product name', '').lower() for kw in keywords)
-    ]
-    return data    
-
-
-def save_products(data: list, csv_file: str = "data/raw_physical_products.csv", json_file: str = "data/raw_physical_products.json"):
+    # ancien nom, conservé pour compatibilité : les mots-clés des produits
+    # pour la peau sont dans filter_rules.json
+    return filter_skin_products(data)
 
-    
-    # nettoyer les données de prix
-    orgniz_data = []
-    for catgegory in data:
-        for item in catgegory:
-            price_str = item.get('Price (€)','')
-            if price_str != 'ToBeDefined':
-                price_num = re.sub(r'[^\d,]', '', price_str).replace(',', '.')
-            else:
-                price_num = price_str
-            item['Price (€)'] = price_num
-            orgniz_data.append(item)
-    
-    # sauvegarder les données dans le fichier csv
-    headers = orgniz_data[0].keys()
-    with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
-        writer.writeheader()
-        writer.writerows(orgniz_data)
-    print(f"CSV file has been saved：{csv_file}")
-    
-    # sauvegarder les données dans le fichier json
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(orgniz_data, f, ensure_ascii=False, indent=2)
-    
-    print(f"JSON file has been saved：{json_file}")
-    
 
-def main():
+# ======================
+# MAIN
+# ======================
+def load_previous_products(csv_file=CSV_PATH) -> list:
+    """Rows of the previous snapshot, prices kept as saved ("38.90")."""
+    if not os.path.exists(csv_file):
+        return []
+    with open(csv_file, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        # instantané antérieur aux Product ID : rien à réutiliser
+        if PRODUCT_ID not in (reader.fieldnames or []):
+            return []
+        return list(reader)
+
+
+def main(max_workers=MAX_CONCURRENCY, incremental=False, resume=False, base_url=None):
     print("*" * 50)
     print('******************** physcial product scrapping ***************')
     print("*" * 50)
 
     
     # fourir les urls et les catégories des web scrapping
-    urls = ['https://calebasse.com/en/autocuiseurs-pour-decoction', 'https://calebasse.com/en/herbiers-et-kits', 'https://calebasse.com/en/materiel-de-moxibustion', 'https://calebasse.com/en/materiel-dacupuncture', 'https://calebasse.com/en/nouveautes','https://calebasse.com/en/ventouses', 'https://calebasse.com/en/objets-decoratifs', 'https://calebasse.com/en/livres' ]
+    # (base_url : autre site que calebasse.com, par exemple le serveur local de test)
+    urls = [site_url(path, base_url) for path in ['/en/autocuiseurs-pour-decoction', '/en/herbiers-et-kits', '/en/materiel-de-moxibustion', '/en/materiel-dacupuncture', '/en/nouveautes','/en/ventouses', '/en/objets-decoratifs', '/en/livres' ]]
     cathegory = ['cooker', 'kit', 'moxibustion', 'acupuncture','new products', 'cupping', 'decorative', 'books']
-    all_physical_products = []
-    
-    # web scrapping des produits d'équipement
-    for url, cat in zip(urls, cathegory):
-        webbrowser.open(url, new=2)
-        print(cat)
-        data = scrap_physical_products(url, cat)
-        all_physical_products.append(data)
-    
-    # web scrapping des produits au service de la peau
-    url_skin = 'https://calebasse.com/en/peau'
-    webbrowser.open(url_skin, new=2)
-    data_skin = scrap_physical_products(url_skin, 'skin')
-    data_skin_filter = skin_products_filter(data_skin)
-    all_physical_products.append(data_skin_filter)   
-    
-    save_products(all_physical_products)
 
-    
-if __name__ == "__main__":
-    main()
-        
-        
-            
+    # la catégorie peau est scrappée avec les autres puis filtrée
+    url_skin = site_url('/en/peau', base_url)
+    units = list(zip(urls, cathegory)) + [(url_skin, 'skin')]
+
+    # mode incrémental : empreintes des catégories et instantané précédent
+    tracker = ChangeTracker() if incremental else None
+    previous = load_previous_products(CSV_PATH) if incremental else None
+    old_snapshot = read_snapshot(CSV_PATH) if incremental else None
+
+    # web scrapping concurrent de toutes les catégories : chaque catégorie
+    # terminée est écrite tout de suite, dans l'ordre des urls ;
+    # les pages terminées sont journalisées pour pouvoir reprendre (--resume)
+    journal = CrawlJournal("physical", resume=resume)
+    with RecordSink(CSV_PATH, FIELDNAMES, NDJSON_PATH) as sink:
+
+        def emit(index, records):
+            # règles par catégorie (filter_rules.json), dont les produits
+            # au service de la peau
+            sink.write(clean_products(product_filter("physical").records(records)))
+
+        try:
+            crawl_physical_categories(units, emit, max_workers, tracker, previous,
+                                      journal=journal)
+        finally:
+            journal.close()
+            # débit atteint par hôte : point de départ du prochain crawl
+            RATE_LIMITER.save()
+    journal.clear()
+    store = convert_csv(CSV_PATH)
+
+    print(f"[SAVED] {sink.count} products → {store}, {CSV_PATH}, {NDJSON_PATH}")
+
+    if incremental:
+        new_snapshot = read_snapshot(CSV_PATH)
+        write_delta(old_snapshot, new_snapshot, CSV_PATH,
+                    identity_keys([old_snapshot, new_snapshot], ['Product name', 'Product category']))
+        tracker.save()
+
 
 # ======================
 # ENTRY POINT
 # ======================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scrap physical products")
+    parser.add_argument("--max-age", type=float, default=None,
+                        help="serve cached pages younger than MAX_AGE seconds without revalidation")
+    parser.add_argument("--incremental", action="store_true",
+                        help="reuse unchanged categories and write a delta file")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip the pages completed by the last interrupted run")
+    parser.add_argument("--base-url", default=None,
+                        help="site to crawl (default: CALEBASSE_BASE_URL or https://calebasse.com)")
+    args = parser.parse_args()
+    PAGE_CACHE.max_age = args.max_age
+    main(incremental=args.incremental, resume=args.resume, base_url=args.base_url)
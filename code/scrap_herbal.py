@@ -14,59 +14,243 @@ Description :
 
 import requests
 from bs4 import BeautifulSoup
+import re
 import sys
 import pandas as pd
 import os
 
+from .crawler import fetch_and_parse, site_url, MAX_CONCURRENCY, PARSE_WORKERS, RATE_LIMITER
+from .metrics import METRICS
+from .http_cache import PAGE_CACHE
+from .listing_parser import parse_herbal_page
+from .incremental import ChangeTracker, fingerprint, page_digest, read_snapshot, write_delta
+from .sinks import OrderedBatches, RecordSink
+from .checkpoint import CrawlJournal
+from .storage import convert_csv
+from .identity import PRODUCT_ID, identity_keys, product_handle
 
-def scrap(base_url, category_name, nb_pages):
+# nom du parsing mis en cache par le PAGE_CACHE (v2 : items avec handle)
+PARSER = "herbal-page-v2"
+
+
+def listing_url(base_url, page):
+    """URL of a listing page: the first page is the category URL itself."""
+    return base_url if page == 1 else f"{base_url}?page={page}"
+
+
+def parse_page(html):
     """
-    Scrap products from a single category URL.
-    Returns a DataFrame.
+    Extract the products of a listing page.
+    Returns a list of (name, price, handle): handle is the product URL
+    handle (stable product ID), None when the card has no link.
+    Reference implementation: the crawl uses the faster, identical
+    listing_parser extraction (parse_herbal_listing / parse_herbal_page).
     """
-    products = []
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                      "(KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36"
-    }
-
-    for page in range(1, nb_pages + 1):
-        url = f"{base_url}?page={page}" if nb_pages > 1 else base_url
+    soup = BeautifulSoup(html, 'lxml')
+
+    # Extract titles and prices
+    title_tags = soup.find_all(
+        'div',
+        class_='product-card-title line-clamp-2 max-w-full font-medium underline-offset-2 group-hover:underline text-center text-sm @[200px]:text-base'
+    )
+    price_tags = soup.find_all(
+        'div',
+        class_='product-card-price flex items-center gap-2 text-base font-medium @[200px]:text-lg'
+    )
+
+    items = []
+    for i in range(len(title_tags)):
+        name = title_tags[i].get_text(strip=True)
+        price_span = price_tags[i].find('span')
         try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-        except requests.RequestException as e:
-            print(f"❌ Failed to connect to {url}: {e}")
-            continue
-
-        soup = BeautifulSoup(response.text, 'lxml')
-
-        # Extract titles and prices
-        title_tags = soup.find_all(
-            'div',
-            class_='product-card-title line-clamp-2 max-w-full font-medium underline-offset-2 group-hover:underline text-center text-sm @[200px]:text-base'
-        )
-        price_tags = soup.find_all(
-            'div',
-            class_='product-card-price flex items-center gap-2 text-base font-medium @[200px]:text-lg'
-        )
-
-        for i in range(len(title_tags)):
-            name = title_tags[i].get_text(strip=True)
-            price_span = price_tags[i].find('span')
-            try:
-                price = float(price_span.get_text(strip=True).replace('€','').replace(',', '.').strip())
-            except Exception:
-                price = None
-            products.append((name, price, category_name))
-
-    df = pd.DataFrame(products, columns=['Product name', 'Price (€)', 'Category'])
-    return df
-
-
-def scrap_all():
+            price = float(price_span.get_text(strip=True).replace('€','').replace(',', '.').strip())
+        except Exception:
+            price = None
+        link = title_tags[i].find_parent('a', href=True)
+        if link is None:
+            card = title_tags[i].find_parent('div', class_=re.compile("^product-card @container"))
+            link = card.find('a', href=True) if card is not None else None
+        items.append((name, price, product_handle(link['href']) if link is not None else None))
+    return items
+
+
+def fetch_page(url):
+    """Fetch a listing page through the page cache, None on failure."""
+    try:
+        return PAGE_CACHE.get(url, parser=PARSER)
+    except requests.RequestException as e:
+        print(f"❌ Failed to connect to {url}: {e}")
+        return None
+
+
+def fetch_listing(base_url, page):
+    return fetch_page(listing_url(base_url, page))
+
+
+def page_discovery():
+    """
+    fetch_and_parse hook: fan out the pages linked from the pagination
+    of each fetched page. The first page usually links all of them; the
+    rel="next" link covers windowed pagination. Each page is fetched once.
+    """
+    scheduled = set()
+
+    def next_pages(unit, parsed):
+        base_url, page = unit
+        scheduled.add(unit)
+        linked = set(parsed["pages"])
+        if parsed["items"] and parsed["has_next"]:
+            linked.add(page + 1)
+        follow = [(base_url, n) for n in sorted(linked) if (base_url, n) not in scheduled]
+        scheduled.update(follow)
+        return follow
+
+    return next_pages
+
+
+def scrap_page(url, category_name):
+    """
+    Scrap a single listing page.
+    Returns a list of (name, price, category, product ID) tuples.
+    """
+    page = fetch_page(url)
+    if page is None:
+        return []
+    parsed = page.parsed
+    if parsed is None:
+        parsed = parse_herbal_page(page.text)
+        PAGE_CACHE.store_parsed(page.url, parsed, parser=PARSER)
+    return [(name, price, category_name, handle) for name, price, handle in parsed["items"]]
+
+
+COLUMNS = ['Product name', 'Price (€)', 'Category', PRODUCT_ID]
+
+
+def to_dataframe(products):
+    return pd.DataFrame(products, columns=COLUMNS)
+
+
+def snapshot_rows(previous, category_name):
+    """Rows of a category in the previous snapshot, as (name, price, category, product ID)."""
+    rows = previous[previous['Category'] == category_name].reindex(columns=COLUMNS)
+    return [(name, None if pd.isna(price) else price, category, None if pd.isna(handle) else handle)
+            for name, price, category, handle in rows.itertuples(index=False)]
+
+
+def crawl_categories(categories, emit, max_workers=MAX_CONCURRENCY,
+                     tracker=None, previous=None, parse_workers=PARSE_WORKERS,
+                     journal=None):
+    """
+    Scrap every page of every (url, category) through one shared crawl,
+    so the global concurrency cap applies to the whole refresh.
+    The first page of each category gives its page count and the other
+    pages are then fetched in parallel; pages are parsed in a process
+    pool while the next ones are fetched.
+
+    emit(index, rows) receives the (name, price, category, product ID) rows of each
+    category as soon as it is complete, in the input order, so callers
+    can stream them to disk instead of holding the whole catalog.
+    In incremental mode (tracker given), a category whose pages hash
+    to the same fingerprint as last run emits its rows from the
+    previous snapshot.
+    With a journal (CrawlJournal), every completed page is recorded and
+    pages already done by an interrupted run are replayed without request.
+    """
+    index_of = {base_url: index for index, (base_url, _) in enumerate(categories)}
+    digests = [{} for _ in categories]
+    complete = [True] * len(categories)
+
+    def release(index, pages):
+        base_url, category_name = categories[index]
+        if tracker is not None and complete[index]:
+            digest = fingerprint(digests[index][page] for page in sorted(digests[index]))
+            if (tracker.is_unchanged(base_url, digest) and previous is not None
+                    and (previous['Category'] == category_name).any()):
+                print(f"Unchanged category: {category_name}")
+                rows = snapshot_rows(previous, category_name)
+                record_category(category_name, len(rows), len(pages), unchanged=True)
+                emit(index, rows)
+                return
+            tracker.update(base_url, digest)
+
+        print(f"{category_name}: {len(pages)} page(s)")
+        rows = [(name, price, category_name, handle)
+                for items in pages for name, price, handle in items]
+        record_category(category_name, len(rows), len(pages))
+        emit(index, rows)
+
+    batches = OrderedBatches(len(categories), release)
+
+    def fetch(base_url, page):
+        if journal is not None:
+            replayed = journal.replay(listing_url(base_url, page))
+            if replayed is not None:
+                return replayed
+        cached_page = fetch_listing(base_url, page)
+        if cached_page is None:
+            complete[index_of[base_url]] = False
+        return cached_page
+
+    def on_page(unit, page, parsed):
+        # cache du parsing, puis seuls les produits restent en mémoire
+        if page.parsed is None:
+            PAGE_CACHE.store_parsed(page.url, parsed, parser=PARSER)
+        base_url, number = unit
+        digest = page.digest or page_digest(page.content)
+        if journal is not None and page.digest is None:
+            journal.record(page.url, parsed, digest)
+        digests[index_of[base_url]][number] = digest
+        batches.add(index_of[base_url], number, parsed["items"])
+
+    for _, category_name in categories:
+        print(f"Scraping category: {category_name}")
+
+    fetch_and_parse(
+        [(base_url, 1) for base_url, _ in categories],
+        fetch, parse_herbal_page,
+        on_result=on_page, next_units=page_discovery(),
+        on_group_done=lambda base_url: batches.close(index_of[base_url]),
+        max_workers=max_workers, parse_workers=parse_workers, name="herbal",
+    )
+
+
+def record_category(category_name, records, pages, unchanged=False):
+    METRICS.inc("records_total", records, dataset="herbal", category=category_name)
+    METRICS.log("category", dataset="herbal", category=category_name, records=records,
+                pages=pages, unchanged=unchanged)
+
+
+def scrap_categories(categories, max_workers=MAX_CONCURRENCY,
+                     tracker=None, previous=None, parse_workers=PARSE_WORKERS):
+    """
+    Scrap several (url, category) pairs, see crawl_categories.
+    Returns one DataFrame per category, in the input order.
+    """
+    rows = [[] for _ in categories]
+
+    def collect(index, category_rows):
+        rows[index] = category_rows
+
+    crawl_categories(categories, collect, max_workers, tracker, previous, parse_workers)
+    return [to_dataframe(category_rows) for category_rows in rows]
+
+
+def scrap(base_url, category_name, max_workers=MAX_CONCURRENCY):
+    """
+    Scrap products from a single category URL.
+    The page count is discovered from the pagination. Returns a DataFrame.
+    """
+    return scrap_categories([(base_url, category_name)], max_workers)[0]
+
+
+def scrap_all(max_workers=MAX_CONCURRENCY, incremental=False, resume=False, base_url=None):
     """
     Scrap all herbal products (type + usage) and save CSVs.
+    With incremental=True, unchanged categories are reused from the
+    previous CSVs and a delta file is written next to each of them.
+    With resume=True, the pages completed by an interrupted run are
+    taken from the crawl journal and only the remaining ones are fetched.
+    base_url replaces the site address (BASE_URL, CALEBASSE_BASE_URL).
     """
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     DATA_DIR = os.path.join(BASE_DIR, "data")
@@ -74,58 +258,100 @@ def scrap_all():
 
     # --- Categories by product type ---
     categories_pages = [
-        ('https://calebasse.com/en/bains-de-pieds', 'Foot baths', 1),
-        ('https://calebasse.com/en/bio', 'Bio', 1),
-        ('https://calebasse.com/en/champignons', 'Mushroom', 1),
-        ('https://calebasse.com/en/gruaux', 'Congees', 1),
-        ('https://calebasse.com/en/infusions-a-fleurs', 'Flower infusions', 1),
-        ('https://calebasse.com/en/melanges-maison', 'Homemade blends', 1),
-        ('https://calebasse.com/en/plantes-en-vrac', 'Bulk plantes', 2),
-        ('https://calebasse.com/en/thes', 'Tea', 2),
-        ('https://calebasse.com/en/plantes-mtc', 'TMC Herbs', 5),
-        ('https://calebasse.com/en/complements-alimentaires', 'Food supplements', 1),
-        ('https://calebasse.com/en/ingredients-petites-formules', 'Plant powder', 1)
+        ('/en/bains-de-pieds', 'Foot baths'),
+        ('/en/bio', 'Bio'),
+        ('/en/champignons', 'Mushroom'),
+        ('/en/gruaux', 'Congees'),
+        ('/en/infusions-a-fleurs', 'Flower infusions'),
+        ('/en/melanges-maison', 'Homemade blends'),
+        ('/en/plantes-en-vrac', 'Bulk plantes'),
+        ('/en/thes', 'Tea'),
+        ('/en/plantes-mtc', 'TMC Herbs'),
+        ('/en/complements-alimentaires', 'Food supplements'),
+        ('/en/ingredients-petites-formules', 'Plant powder')
     ]
 
-    dfs = []
-    for base_url, category_name, nb_pages in categories_pages:
-        print(f"Scraping type category: {category_name}")
-        df_temp = scrap(base_url, category_name, nb_pages)
-        dfs.append(df_temp)
-
-    df_herbal_product = pd.concat(dfs, ignore_index=True)
-    df_herbal_product.to_csv("data/raw_herbal_products.csv", index=False, encoding="utf-8-sig")
-    print(f"✅ Total number of scraped products (type): {len(df_herbal_product)}")
-
     # --- Categories by product usage ---
     uses_pages = [
-        ('https://calebasse.com/en/articulations-and-muscles', 'Articulations and muscles', 1),
-        ('https://calebasse.com/en/calme-and-bien-etre', 'Calm and well-being', 1),
-        ('https://calebasse.com/en/confort-respiratoire', 'Respiratory comfort', 1),
-        ('https://calebasse.com/en/detox-and-draineur', 'Detox and drainer', 1),
-        ('https://calebasse.com/en/equilibre-feminin', 'Female balance', 1),
-        ('https://calebasse.com/en/forme', 'Fatigue and Energy', 2),
-        ('https://calebasse.com/en/sante-cardiovasculaire', 'Cardiovascular health', 1),
-        ('https://calebasse.com/en/beaute-and-minceur', 'Beauty and slimming', 1),
-        ('https://calebasse.com/en/circulation', 'Circulation', 1),
-        ('https://calebasse.com/en/confort-urinaire', 'Urinary comfort', 1),
-        ('https://calebasse.com/en/digestion', 'Digestion', 1),
-        ('https://calebasse.com/en/equilibre-masculin', 'Male balance', 1),
-        ('https://calebasse.com/en/mtv', 'MTV', 1),
-        ('https://calebasse.com/en/vitalite-sexuelle', 'Sexual vitality', 1)
+        ('/en/articulations-and-muscles', 'Articulations and muscles'),
+        ('/en/calme-and-bien-etre', 'Calm and well-being'),
+        ('/en/confort-respiratoire', 'Respiratory comfort'),
+        ('/en/detox-and-draineur', 'Detox and drainer'),
+        ('/en/equilibre-feminin', 'Female balance'),
+        ('/en/forme', 'Fatigue and Energy'),
+        ('/en/sante-cardiovasculaire', 'Cardiovascular health'),
+        ('/en/beaute-and-minceur', 'Beauty and slimming'),
+        ('/en/circulation', 'Circulation'),
+        ('/en/confort-urinaire', 'Urinary comfort'),
+        ('/en/digestion', 'Digestion'),
+        ('/en/equilibre-masculin', 'Male balance'),
+        ('/en/mtv', 'MTV'),
+        ('/en/vitalite-sexuelle', 'Sexual vitality')
     ]
+    categories_pages = [(site_url(path, base_url), name) for path, name in categories_pages]
+    uses_pages = [(site_url(path, base_url), name) for path, name in uses_pages]
+
+    # Type and usage categories are crawled together: a full refresh
+    # takes about as long as the slowest category.
+    herbal_csv = "data/raw_herbal_products.csv"
+    uses_csv = "data/raw_uses_products.csv"
+    tracker = previous = None
+    old_herbal = old_uses = None
+    if incremental:
+        tracker = ChangeTracker()
+        old_herbal = read_snapshot(herbal_csv)
+        old_uses = read_snapshot(uses_csv)
+        previous = pd.concat([df for df in (old_herbal, old_uses) if df is not None]
+                             or [to_dataframe([])], ignore_index=True)
+        # instantané antérieur aux Product ID : rien à réutiliser
+        if PRODUCT_ID not in previous:
+            previous = None
 
-    dfs_uses = []
-    for base_url, category_name, nb_pages in uses_pages:
-        print(f"Scraping usage category: {category_name}")
-        df_temp = scrap(base_url, category_name, nb_pages)
-        dfs_uses.append(df_temp)
+    # Rows are streamed to the CSVs category by category; the files are
+    # only replaced once the whole crawl succeeded.
+    journal = CrawlJournal("herbal", resume=resume)
+    with RecordSink(herbal_csv, COLUMNS, encoding="utf-8-sig") as herbal_sink, \
+            RecordSink(uses_csv, COLUMNS, encoding="utf-8-sig") as uses_sink:
 
-    df_uses_product = pd.concat(dfs_uses, ignore_index=True)
-    df_uses_product.to_csv("data/raw_uses_products.csv", index=False, encoding='utf-8-sig')
-    print(f"✅ Total number of scraped products (uses): {len(df_uses_product)}")
+        def emit(index, rows):
+            sink = herbal_sink if index < len(categories_pages) else uses_sink
+            sink.write(dict(zip(COLUMNS, row)) for row in rows)
+
+        try:
+            crawl_categories(categories_pages + uses_pages, emit, max_workers, tracker, previous,
+                             journal=journal)
+        finally:
+            journal.close()
+            # débit atteint par hôte : point de départ du prochain crawl
+            RATE_LIMITER.save()
+    journal.clear()
+    # table Arrow canonique, lue par process_herbal
+    convert_csv(herbal_csv)
+    convert_csv(uses_csv)
+
+    print(f"✅ Total number of scraped products (type): {herbal_sink.count}")
+    print(f"✅ Total number of scraped products (uses): {uses_sink.count}")
+
+    if incremental:
+        for old, path in [(old_herbal, herbal_csv), (old_uses, uses_csv)]:
+            new = read_snapshot(path)
+            write_delta(old, new, path, identity_keys([old, new], ['Product name', 'Category']))
+        tracker.save()
 
 
 # --- Main entry ---
 if __name__ == "__main__":
-    scrap_all()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scrap herbal products")
+    parser.add_argument("--max-age", type=float, default=None,
+                        help="serve cached pages younger than MAX_AGE seconds without revalidation")
+    parser.add_argument("--incremental", action="store_true",
+                        help="reuse unchanged categories and write delta files")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip the pages completed by the last interrupted run")
+    parser.add_argument("--base-url", default=None,
+                        help="site to crawl (default: CALEBASSE_BASE_URL or https://calebasse.com)")
+    args = parser.parse_args()
+    PAGE_CACHE.max_age = args.max_age
+    scrap_all(incremental=args.incremental, resume=args.resume, base_url=args.base_url)
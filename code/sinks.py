@@ -0,0 +1,118 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Écriture en flux des enregistrements scrappés : chaque lot est
+    ajouté au CSV (et au NDJSON) dès qu'il est parsé, dans des fichiers
+    temporaires « .part » renommés atomiquement à la fin du run.
+    La mémoire ne dépend pas de la taille du catalogue et un run
+    interrompu laisse ses fichiers .part avec le travail déjà fait.
+-------------------------------------------------
+"""
+
+import csv
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Sequence
+
+from .metrics import table_written
+
+
+# ======================
+# SINK
+# ======================
+class RecordSink:
+    """
+    Stream dict records to a CSV file and optionally an NDJSON file.
+    Files are written as <path>.part and renamed over <path> on commit(),
+    so readers never see a half-written snapshot.
+    """
+
+    def __init__(self, csv_path, fieldnames: Sequence[str], ndjson_path=None,
+                 encoding: str = "utf-8"):
+        self.csv_path = Path(csv_path)
+        self.ndjson_path = Path(ndjson_path) if ndjson_path else None
+        self.fieldnames = list(fieldnames)
+        self.count = 0
+
+        self.csv_path.parent.mkdir(parents=True, exist_ok=True)
+        self._csv_file = open(self.part_path(self.csv_path), "w", newline="", encoding=encoding)
+        self._writer = csv.DictWriter(self._csv_file, fieldnames=self.fieldnames)
+        self._writer.writeheader()
+        self._ndjson_file = (
+            open(self.part_path(self.ndjson_path), "w", encoding="utf-8")
+            if self.ndjson_path else None
+        )
+
+    @staticmethod
+    def part_path(path: Path) -> Path:
+        return path.with_name(path.name + ".part")
+
+    def write(self, records: Iterable[Dict]) -> None:
+        """Append a batch of records and flush it to disk."""
+        for record in records:
+            self._writer.writerow(record)
+            if self._ndjson_file is not None:
+                self._ndjson_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.count += 1
+        for f in (self._csv_file, self._ndjson_file):
+            if f is not None:
+                f.flush()
+
+    def close(self) -> None:
+        for f in (self._csv_file, self._ndjson_file):
+            if f is not None and not f.closed:
+                f.flush()
+                os.fsync(f.fileno())
+                f.close()
+
+    def commit(self) -> None:
+        """Close the .part files and atomically replace the final files."""
+        self.close()
+        os.replace(self.part_path(self.csv_path), self.csv_path)
+        if self.ndjson_path:
+            os.replace(self.part_path(self.ndjson_path), self.ndjson_path)
+        table_written(self.csv_path, self.count)
+
+    def __enter__(self) -> "RecordSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # en cas d'erreur les fichiers .part restent sur le disque
+        if exc_type is None:
+            self.commit()
+        else:
+            self.close()
+
+
+# ======================
+# ORDERING
+# ======================
+class OrderedBatches:
+    """
+    Reorder batches coming from concurrent workers.
+    Batches are added per group (a category) and position (a page);
+    once a group is closed and every group before it too, its batches
+    are released to release(group, batches) sorted by position.
+    Only groups waiting for an earlier one stay in memory.
+    """
+
+    def __init__(self, nb_groups: int, release: Callable[[int, List], None]):
+        self.release = release
+        self.pending: List[Dict] = [{} for _ in range(nb_groups)]
+        self.closed = [False] * nb_groups
+        self.next_group = 0
+
+    def add(self, group: int, position, batch) -> None:
+        self.pending[group][position] = batch
+
+    def close(self, group: int) -> None:
+        self.closed[group] = True
+        while self.next_group < len(self.closed) and self.closed[self.next_group]:
+            batches = self.pending[self.next_group]
+            self.pending[self.next_group] = {}
+            self.release(self.next_group, [batches[key] for key in sorted(batches)])
+            self.next_group += 1
@@ -0,0 +1,209 @@
+"""
+-------------------------------------------------
+Project : Product Data Analysis -- Calebasse Laboratoire
+Author  : DOAN Ngoc Anh Thu / Xinyi DU
+Date    : 2026-10-18
+Description :
+    Stockage colonnaire des tables du pipeline (raw -> final) au format
+    Arrow IPC (.arrow) : colonnes de catégories encodées en dictionnaire,
+    prix typés en float. La lecture ne parse aucun texte et passe par un
+    fichier mappé en mémoire. Le CSV reste un export optionnel ;
+    si pyarrow n'est pas installé, les tables restent en CSV.
+    Aussi : empreintes (hash) des fichiers et écriture d'une image
+    seulement si son contenu change, sans dépendance à Streamlit.
+-------------------------------------------------
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:   # pragma: no cover - pyarrow est optionnel
+    pa = None
+
+# ======================
+# CONFIG
+# ======================
+STORE_SUFFIX = ".arrow"
+# "zstd" : fichiers 3 à 4 fois plus petits que le CSV ;
+# "uncompressed" : lecture zero-copy directement dans le fichier mappé
+STORE_COMPRESSION = "zstd"
+EXPORT_CSV = True        # écrire aussi le CSV à côté de chaque table
+
+CATEGORY_COLUMNS = ['Category', 'Product category', 'Use category']
+PRICE_COLUMNS = ['Price (€)']
+
+
+# ======================
+# SCHEMA
+# ======================
+def table_path(path) -> Path:
+    """data/final_herb_products.csv -> data/final_herb_products.arrow"""
+    return Path(path).with_suffix(STORE_SUFFIX)
+
+
+def typed(df: pd.DataFrame, categorical: bool = True) -> pd.DataFrame:
+    """Categories as dictionary-encoded columns, prices as floats."""
+    df = df.copy()
+    for column in CATEGORY_COLUMNS:
+        if categorical and column in df.columns:
+            df[column] = df[column].astype('category')
+    for column in PRICE_COLUMNS:
+        if column in df.columns:
+            # "ToBeDefined" et prix vides -> NaN
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('float64')
+    return df
+
+
+# ======================
+# WRITE / READ
+# ======================
+def write_table(df: pd.DataFrame, path, export_csv: Optional[bool] = None,
+                csv_encoding: str = 'utf-8-sig') -> Path:
+    """
+    Save df as the canonical .arrow table next to path (a .csv path),
+    plus the CSV export when export_csv (EXPORT_CSV by default).
+    Both files are written to a temporary file and renamed.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    export_csv = EXPORT_CSV if export_csv is None else export_csv
+
+    if export_csv or pa is None:
+        tmp_path = path.with_name(path.name + ".tmp")
+        df.to_csv(tmp_path, index=False, encoding=csv_encoding)
+        os.replace(tmp_path, path)
+    if pa is None:
+        return path
+
+    store = table_path(path)
+    table = pa.Table.from_pandas(typed(df), preserve_index=False)
+    tmp_store = store.with_name(store.name + ".tmp")
+    options = pa.ipc.IpcWriteOptions(
+        compression=None if STORE_COMPRESSION == "uncompressed" else STORE_COMPRESSION
+    )
+    with pa.OSFile(str(tmp_store), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+    os.replace(tmp_store, store)
+    return store
+
+
+def read_table(path, columns: Optional[List[str]] = None, categorical: bool = True,
+               csv_encoding: str = 'utf-8-sig') -> pd.DataFrame:
+    """
+    Load a pipeline table: the memory-mapped .arrow file when it exists
+    and is at least as recent as the CSV, the CSV otherwise.
+    categorical=False decodes the category columns to plain strings,
+    for the processing stages that edit them.
+    """
+    path = Path(path)
+    store = table_path(path)
+    if pa is not None and store.exists() and (
+            not path.exists() or store.stat().st_mtime >= path.stat().st_mtime):
+        with pa.memory_map(str(store), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+        if not categorical:
+            for i, field in enumerate(table.schema):
+                if pa.types.is_dictionary(field.type):
+                    table = table.set_column(i, field.name,
+                                             table.column(i).cast(field.type.value_type))
+        return table.to_pandas()
+    return typed(pd.read_csv(path, usecols=columns, encoding=csv_encoding), categorical)
+
+
+def convert_csv(path, csv_encoding: str = 'utf-8-sig') -> Path:
+    """Build the .arrow table of a CSV written elsewhere (scraper output)."""
+    df = pd.read_csv(path, encoding=csv_encoding)
+    return write_table(df, path, export_csv=False, csv_encoding=csv_encoding)
+
+
+def table_exists(path) -> bool:
+    return Path(path).exists() or (pa is not None and table_path(path).exists())
+
+
+# ======================
+# CACHE
+# ======================
+# tables déjà chargées : chemin -> (version des fichiers, table)
+_tables: Dict[str, Tuple] = {}
+_tables_lock = threading.Lock()
+
+
+def table_version(path) -> Tuple:
+    """mtime and size of the files read_table may load."""
+    return tuple((os.stat(f).st_mtime_ns, os.stat(f).st_size) if os.path.exists(f) else None
+                 for f in (path, table_path(path)))
+
+
+def cached_table(path) -> pd.DataFrame:
+    """
+    read_table loaded once per process and reused until the CSV or the
+    .arrow file changes. The table is shared: callers must not modify it.
+    """
+    key, version = str(path), table_version(path)
+    with _tables_lock:
+        cached = _tables.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    df = read_table(path)
+    with _tables_lock:
+        _tables[key] = (version, df)
+    return df
+
+
+# ======================
+# HASH
+# ======================
+# empreintes déjà calculées, par (chemin, mtime, taille)
+_digests: Dict[Tuple, str] = {}
+# empreinte des images écrites par ce processus
+_written: Dict[str, str] = {}
+
+
+def file_digest(path) -> str:
+    """sha256 of a file, recomputed only when its mtime or size changes."""
+    if not os.path.exists(path):
+        return ""
+    stat = os.stat(path)
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    if key not in _digests:
+        with open(path, "rb") as f:
+            _digests[key] = hashlib.sha256(f.read()).hexdigest()
+    return _digests[key]
+
+
+def data_digest(paths: Iterable) -> str:
+    """Digest of pipeline tables, CSV and .arrow files included."""
+    digest = hashlib.sha256()
+    for path in paths:
+        for f in (path, table_path(path)):
+            digest.update(file_digest(f).encode())
+    return digest.hexdigest()
+
+
+def write_if_changed(image_name, png: bytes) -> bool:
+    """Write png to image_name unless the file already holds these bytes."""
+    digest = hashlib.sha256(png).hexdigest()
+    if _written.get(image_name) == digest:
+        return False
+    if os.path.exists(image_name) and file_digest(image_name) == digest:
+        _written[image_name] = digest
+        return False
+
+    os.makedirs(os.path.dirname(image_name) or ".", exist_ok=True)
+    tmp_path = image_name + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(png)
+    os.replace(tmp_path, image_name)
+    _written[image_name] = digest
+    return True